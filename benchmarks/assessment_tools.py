@@ -0,0 +1,40 @@
+"""Generating the assessment tools of a course with 24 assessments serially and in worker processes
+
+The course is made of copies of the test fixture's assessments.
+
+Run from the repo root: python -m benchmarks.assessment_tools
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+FIXTURE = Path("tests/fixtures/course")
+
+# The generator modules read these at import time
+os.environ.setdefault("COURSE_CONTENT", str(FIXTURE))
+os.environ.setdefault("OUTPUT_LOCATION", str(FIXTURE))
+
+from src.assessment_tools import ASSESSMENTS, assess_tool  # noqa: E402
+
+
+def main(count: int = 24):
+    with tempfile.TemporaryDirectory() as directory:
+        course = Path(directory) / "course"
+        sources = sorted((FIXTURE / ASSESSMENTS).iterdir())
+        for index in range(count):
+            source = sources[index % len(sources)]
+            shutil.copytree(source, course / ASSESSMENTS / f"AT{index} {source.name}")
+
+        for workers in sorted({0, 2, 4, os.cpu_count() or 1}):
+            output = Path(directory) / f"output {workers}"
+            output.mkdir()
+            start = time.perf_counter()
+            assess_tool(course, output, max_workers=workers)
+            print(f"{workers} workers: {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Building a course's assessment tools and mapping matrices one after another and as a task graph
+
+Units are fetched from a local training.gov.au stand-in with injected latency into an
+empty cache on every run. The course maps its assessments to three units.
+
+Run from the repo root: python -m benchmarks.build [latency]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+FIXTURE = Path("tests/fixtures/course")
+UNITS = ["ICTAII501", "ICTAII502", "ICTPRG443"]
+
+# The generator modules read these at import time
+os.environ.setdefault("COURSE_CONTENT", str(FIXTURE))
+os.environ.setdefault("OUTPUT_LOCATION", str(FIXTURE))
+
+from src.assessment_tools import assess_tool  # noqa: E402
+from src.build import build  # noqa: E402
+from src.mapping_matrix import ASSESSMENTS, mapping_matrix  # noqa: E402
+from src.utils import uoc as uoc_module  # noqa: E402
+from src.utils.uoc import UnitOfCompetency, UnitOfCompetencyCache  # noqa: E402
+from tests.tga_server import TrainingGovServer, load_pages  # noqa: E402
+
+
+def sequential(course: Path, output: Path):
+    # What main.py used to do, minus the LAP the fixture course has no content for
+    assess_tool(course, output)
+    mapping_matrix(course, output, force=True)
+
+
+def graph(workers: int):
+    def run(course: Path, output: Path):
+        build(course, output, ["tools", "matrices"], force=True, max_workers=workers)
+
+    return run
+
+
+def main(latency: float = 1.0):
+    with tempfile.TemporaryDirectory() as directory, TrainingGovServer(
+        load_pages(), latency=latency
+    ) as server:
+        UnitOfCompetency.base_url = server.base_url
+        course = Path(directory) / "course"
+        shutil.copytree(FIXTURE, course)
+        for assessment in (course / ASSESSMENTS).rglob("assessment.md"):
+            units = "".join(f"  - id: {unit}\n    name: {unit}\n" for unit in UNITS)
+            text = assessment.read_text()
+            start = text.index("units:\n") + len("units:\n")
+            end = text.index("mapping:")
+            assessment.write_text(text[:start] + units + text[end:])
+
+        runs = {"sequential": sequential, "graph": graph(0)}
+        for workers in sorted({2, os.cpu_count() or 1} - {1}):
+            runs[f"graph, {workers} workers"] = graph(workers)
+        for name, run in runs.items():
+            output = Path(directory) / name
+            output.mkdir()
+            uoc_module.CACHE = UnitOfCompetencyCache(output / "uoc")
+            start = time.perf_counter()
+            run(course, output)
+            print(f"{name}: {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main(*map(float, sys.argv[1:]))
@@ -0,0 +1,55 @@
+"""Rendering the mapping matrices of a course with three units serially and in worker processes
+
+Units come from the test fixture's hand-written unit pages, through an offline cache.
+
+Run from the repo root: python -m benchmarks.mapping_matrix
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+FIXTURE = Path("tests/fixtures/course")
+UNITS = ["ICTAII501", "ICTAII502", "ICTPRG443"]
+
+# The generator modules read these at import time
+os.environ.setdefault("COURSE_CONTENT", str(FIXTURE))
+os.environ.setdefault("OUTPUT_LOCATION", str(FIXTURE))
+
+from src.mapping_matrix import ASSESSMENTS, mapping_matrix  # noqa: E402
+from src.utils import uoc as uoc_module  # noqa: E402
+from src.utils.uoc import UnitOfCompetency, UnitOfCompetencyCache  # noqa: E402
+from tests.tga_server import load_pages  # noqa: E402
+
+
+def main(rounds: int = 4):
+    with tempfile.TemporaryDirectory() as directory:
+        uoc_module.CACHE = UnitOfCompetencyCache(Path(directory) / "uoc", offline=True)
+        for unit_code, html in load_pages().items():
+            uoc_module.CACHE.store(
+                unit_code, UnitOfCompetency.base_url + unit_code, html
+            )
+
+        course = Path(directory) / "course"
+        shutil.copytree(FIXTURE, course)
+        for assessment in (course / ASSESSMENTS).rglob("assessment.md"):
+            units = "".join(f"  - id: {unit}\n    name: {unit}\n" for unit in UNITS)
+            text = assessment.read_text()
+            start = text.index("units:\n") + len("units:\n")
+            end = text.index("mapping:")
+            assessment.write_text(text[:start] + units + text[end:])
+
+        for workers in sorted({0, 2, 4, os.cpu_count() or 1}):
+            output = Path(directory) / f"output {workers}"
+            output.mkdir()
+            start = time.perf_counter()
+            for _ in range(rounds):
+                mapping_matrix(course, output, force=True, max_workers=workers)
+            seconds = (time.perf_counter() - start) / rounds
+            print(f"{workers} workers: {seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Rendering LAP cells through the python-docx proxies and directly as OOXML
+
+Both backends render the same topics into a fresh LAP template, the time per document is
+reported and the resulting body XML is compared.
+
+Run from the repo root: python -m benchmarks.markdown_backends
+"""
+
+import time
+
+from docx import Document
+from lxml import etree
+
+from benchmarks.markdown_cursor import chunk
+from benchmarks.markdown_tokenizer import TOPIC
+from src.utils.markdown import MARKDOWN_BACKENDS, markdown_to_word
+
+TEMPLATE = "templates/Learning and Assessment Plan (F122A14).docx"
+
+
+def render(backend: str, topics: list[str], engine: str) -> tuple[float, bytes]:
+    document = Document(TEMPLATE)
+    cell = document.tables[5].cell(2, 3)
+    start = time.perf_counter()
+    for topic in topics:
+        markdown_to_word(topic, document, cell, engine, backend)
+    seconds = time.perf_counter() - start
+    return seconds, etree.tostring(document.element.body)
+
+
+def main(repeat: int = 5):
+    topics = [TOPIC] * 20 + [chunk(200)] * 5
+    for engine in ("regex", "markdown-it"):
+        results = {}
+        for backend in MARKDOWN_BACKENDS:
+            timings = []
+            for _ in range(repeat):
+                seconds, xml = render(backend, topics, engine)
+                timings.append(seconds)
+            results[backend] = (min(timings), xml)
+            print(f"{engine:12} {backend:5} {min(timings) * 1000:.0f} ms")
+
+        assert len({xml for _, xml in results.values()}) == 1, "backends differ"
+        docx, oxml = results["docx"][0], results["oxml"][0]
+        print(f"{engine:12} oxml is {docx / oxml:.1f}x faster, identical XML")
+
+
+if __name__ == "__main__":
+    main()
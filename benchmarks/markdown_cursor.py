@@ -0,0 +1,58 @@
+"""Rendering a 5,000 line markdown file into a single LAP cell
+
+Markdown is appended in chunks, as lap() does topic by topic, and the time per chunk is
+reported as the cell fills up. For comparison the cost of looking up the cell's last
+paragraph with cell.paragraphs[-1] once per line (what the renderer used to do) is
+measured at the same fill level.
+
+Run from the repo root: python -m benchmarks.markdown_cursor
+"""
+
+import time
+from timeit import timeit
+
+from docx import Document
+
+from src.utils.markdown import markdown_to_word
+
+TEMPLATE = "templates/Learning and Assessment Plan (F122A14).docx"
+
+
+def chunk(lines: int) -> str:
+    """
+    Resource list like markdown, a third of the lines are links continuing a paragraph.
+    """
+    return "\n".join(
+        (
+            f"See [guide {i}](https://example.com/{i % 50})",
+            f"- point **{i}**",
+            f"Line {i} of text",
+        )[i % 3]
+        for i in range(lines)
+    )
+
+
+def main(lines: int = 5000, chunks: int = 5):
+    document = Document(TEMPLATE)
+    cell = document.tables[5].cell(2, 3)
+    text = chunk(lines // chunks)
+
+    total = 0.0
+    for index in range(chunks):
+        start = time.perf_counter()
+        markdown_to_word(text, document, cell)
+        seconds = time.perf_counter() - start
+        total += seconds
+
+        lookup = timeit(lambda: cell.paragraphs[-1], number=20) / 20
+        print(
+            f"lines {index * lines // chunks}-{(index + 1) * lines // chunks}:"
+            f" {seconds * 1000:.0f} ms,"
+            f" {len(cell._tc.p_lst)} paragraphs in the cell,"
+            f" paragraphs[-1] per line would add {lookup * lines / chunks * 1000:.0f} ms"
+        )
+    print(f"{lines} lines rendered in {total:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
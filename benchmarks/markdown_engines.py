@@ -0,0 +1,99 @@
+"""Throughput and output parity of the regex and markdown-it markdown engines
+
+Run from the repo root: python -m benchmarks.markdown_engines
+"""
+
+import difflib
+import time
+from pathlib import Path
+
+from docx import Document
+
+from benchmarks.markdown_tokenizer import TOPIC
+from src.utils.markdown import markdown_to_word, parse_md
+
+TEMPLATE = "templates/Learning and Assessment Plan (F122A14).docx"
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures" / "course"
+
+
+def corpus(copies: int) -> list[str]:
+    """
+    Markdown documents to render, the fixture course's markdown files and a synthetic topic.
+    """
+    documents = [parse_md(path).content for path in sorted(FIXTURES.rglob("*.md"))]
+    return [*documents, TOPIC * 10] * copies
+
+
+def render(documents: list[str], engine: str) -> tuple[float, list[list[tuple]]]:
+    """
+    Render every document into its own LAP topic cell.
+
+    :return: Seconds taken and the (style, text) of every rendered paragraph per document.
+    """
+    template = Document(TEMPLATE)
+    table = template.tables[5]
+    cells = []
+    start = time.perf_counter()
+    for text in documents:
+        cell = table.cell(2, 3)
+        cell.text = ""
+        markdown_to_word(text, template, cell, engine=engine)
+        cells.append([(p.style.name, p.text) for p in cell.paragraphs])
+    return time.perf_counter() - start, cells
+
+
+def content(paragraphs: list[tuple]) -> list[tuple]:
+    """
+    Paragraphs with text, ignoring whitespace.
+
+    The regex engine writes an empty paragraph for every blank line and a line break after
+    every link, neither is content.
+    """
+    return [
+        (style, "".join(text.split())) for style, text in paragraphs if text.strip()
+    ]
+
+
+def text(paragraphs: list[tuple]) -> str:
+    return "".join(text for _, text in paragraphs)
+
+
+def main(copies: int = 20):
+    documents = corpus(copies)
+    lines = sum(len(text.splitlines()) for text in documents)
+    print(f"{len(documents)} documents, {lines} lines")
+
+    results = {}
+    for engine in ("regex", "markdown-it"):
+        seconds, results[engine] = render(documents, engine)
+        print(f"{engine}: {seconds * 1000:.0f} ms ({lines / seconds:.0f} lines/s)")
+
+    identical = same_text = 0
+    pairs = [
+        (content(regex), content(tokens))
+        for regex, tokens in zip(results["regex"], results["markdown-it"])
+    ]
+    for regex, tokens in pairs:
+        identical += regex == tokens
+        same_text += text(regex) == text(tokens)
+    print(
+        f"identical paragraphs: {identical}/{len(documents)} documents,"
+        f" identical text: {same_text}/{len(documents)} documents"
+    )
+    # Show where the engines differ for the first differing document
+    for regex, tokens in pairs:
+        if regex != tokens:
+            for line in difflib.unified_diff(
+                list(map(repr, regex)),
+                list(map(repr, tokens)),
+                "regex",
+                "markdown-it",
+                lineterm="",
+                n=1,
+            ):
+                print(line)
+            break
+
+
+if __name__ == "__main__":
+    main()
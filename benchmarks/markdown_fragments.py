@@ -0,0 +1,51 @@
+"""Re-generating LAP cells with rendered fragments stored from a previous run
+
+Renders 100 topics into a LAP cell without a fragment store, then into a fresh template with
+an empty store (first run), an unchanged warm store (second run) and a warm store after
+editing one topic.
+
+Run from the repo root: python -m benchmarks.markdown_fragments
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from docx import Document
+
+from benchmarks.markdown_tokenizer import TOPIC
+from src.utils import markdown
+from src.utils.fragments import FragmentStore
+from src.utils.markdown import markdown_to_word
+
+TEMPLATE = "templates/Learning and Assessment Plan (F122A14).docx"
+
+
+def render(topics: list[str]) -> float:
+    document = Document(TEMPLATE)
+    cell = document.tables[5].cell(2, 3)
+    start = time.perf_counter()
+    for topic in topics:
+        markdown_to_word(topic, document, cell)
+    return time.perf_counter() - start
+
+
+def main(count: int = 100):
+    topics = [f"# Topic {i}\n{TOPIC}" for i in range(count)]
+    print(f"no store: {render(topics) * 1000:.0f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = FragmentStore(Path(directory) / "fragments.sqlite3")
+        markdown.FRAGMENT_STORE = store
+        try:
+            for run in ("first run", "second run"):
+                print(f"{run}: {render(topics) * 1000:.0f} ms, {store.info()}")
+            topics[count // 2] += "\nOne more line"
+            print(f"one topic edited: {render(topics) * 1000:.0f} ms, {store.info()}")
+        finally:
+            markdown.FRAGMENT_STORE = None
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
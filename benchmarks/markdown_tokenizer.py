@@ -0,0 +1,84 @@
+"""Microbenchmark of the single pass markdown tokenizer vs the former per style scan
+
+Run from the repo root: python -m benchmarks.markdown_tokenizer
+"""
+
+import re
+from timeit import repeat
+
+from docx import Document
+
+from src.utils.markdown import apply_markdown_style, tokenize
+
+TEMPLATE = "templates/Learning and Assessment Plan (F122A14).docx"
+
+# The patterns as they were before they were combined into one tokenizer
+LEGACY_STYLES = {
+    "h1": re.compile(r"^#{1} (.*)", re.MULTILINE),
+    "h2": re.compile(r"^#{2} (.*)", re.MULTILINE),
+    "h3": re.compile(r"^#{3} (.*)", re.MULTILINE),
+    "h4": re.compile(r"^#{4} (.*)", re.MULTILINE),
+    "h5": re.compile(r"^#{5} (.*)", re.MULTILINE),
+    "h6": re.compile(r"^#{6} (.*)", re.MULTILINE),
+    "bold/italic": re.compile(r"(\*{1,2})([^*]*?)(\*{1,2})"),
+    "code": re.compile(r"`{3}([^`]*)`{3}"),
+    "bullets": re.compile(r"^([' ',\t]*)[*\-+]\s(.*)$", re.MULTILINE),
+    "link": re.compile(r"(?<!!)\[(.*)\]\((.*)\)"),
+    "image": re.compile(r"!\[(.*)\]\((.*)\)"),
+    "linebreak": re.compile(r"^\-{3}$", re.MULTILINE),
+}
+
+TOPIC = """\
+## Machine learning workflows
+Plain text describing the session in a little more detail than a heading.
+- Problem framing with **stakeholders**
+  - Data *collection* and labelling
+    - Model ```evaluation``` metrics
+See [the guide](https://example.com/guide) for more
+Some **bold** and *italic* words with ```code``` in one line
+"""
+
+
+def legacy_scan(text: str) -> int:
+    matches = 0
+    for line in text.split("\n"):
+        found = [
+            (match, style)
+            for style, regex in LEGACY_STYLES.items()
+            for match in regex.finditer(line)
+        ]
+        matches += len(sorted(found, key=lambda x: x[0].start()))
+    return matches
+
+
+def single_pass(text: str) -> int:
+    return sum(len(tokenize(line)) for line in text.split("\n"))
+
+
+def best(function, text: str, number: int) -> float:
+    """
+    Best time in seconds of one call.
+    """
+    return min(repeat(lambda: function(text), number=number, repeat=5)) / number
+
+
+def render(text: str):
+    document = Document(TEMPLATE)
+    apply_markdown_style(document, text, document.tables[5].cell(2, 3))
+
+
+def main(topics: int = 200, number: int = 20):
+    text = TOPIC * topics
+    print(f"{len(text.splitlines())} lines")
+
+    legacy = best(legacy_scan, text, number)
+    combined = best(single_pass, text, number)
+    print(
+        f"tokenize: per style scan {legacy * 1000:.2f} ms,"
+        f" single pass {combined * 1000:.2f} ms ({legacy / combined:.1f}x)"
+    )
+    print(f"render into a LAP cell: {best(render, text, 1) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
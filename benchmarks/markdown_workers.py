@@ -0,0 +1,56 @@
+"""Rendering a very large LAP's cells serially and in worker processes
+
+Renders 300 sessions (topic, resources and activities cells) into the LAP template in the
+main process with either backend, then with render_fragments for increasing worker counts
+and adds the fragments with markdown_to_word. Worker timings include starting the pool and
+the XML of every run is compared.
+
+Run from the repo root: python -m benchmarks.markdown_workers
+"""
+
+import os
+import time
+
+from docx import Document
+from lxml import etree
+
+from benchmarks.markdown_tokenizer import TOPIC
+from src.utils.markdown import markdown_to_word, render_fragments
+
+TEMPLATE = "templates/Learning and Assessment Plan (F122A14).docx"
+
+
+def build(texts: list[str], workers: int, backend=None) -> tuple[float, bytes]:
+    start = time.perf_counter()
+    fragments = (
+        render_fragments(texts, TEMPLATE, max_workers=workers) if workers else None
+    )
+    document = Document(TEMPLATE)
+    table = document.tables[5]
+    cells = [table.cell(2 + row, 3 + row) for row in range(3)]
+    for index, text in enumerate(texts):
+        markdown_to_word(
+            text, document, cells[index % 3], backend=backend, fragments=fragments
+        )
+    return time.perf_counter() - start, etree.tostring(document.element.body)
+
+
+def main(sessions: int = 300):
+    texts = [
+        f"# {kind} {i}\n{TOPIC}"
+        for i in range(sessions)
+        for kind in ("Topic", "Resources", "Activities")
+    ]
+    seconds, expected = build(texts, 0, "docx")
+    print(f"main process, docx backend: {seconds:.2f} s")
+    serial, xml = build(texts, 0, "oxml")
+    assert xml == expected, "backends differ"
+    print(f"main process, oxml backend: {serial:.2f} s")
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        seconds, xml = build(texts, workers)
+        assert xml == expected, "worker output differs"
+        print(f"{workers} workers: {seconds:.2f} s ({serial / seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Creating 40 documents from each template with Document(path) and from the template pool
+
+Run from the repo root: python -m benchmarks.templates
+"""
+
+import time
+from pathlib import Path
+
+from docx import Document
+
+from src.utils.templates import TEMPLATE_POOL, open_template
+
+TEMPLATES = sorted(Path("templates").glob("*.docx"))
+
+
+def timed(create, path: Path, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        create(path)
+    return time.perf_counter() - start
+
+
+def main(count: int = 40):
+    for path in TEMPLATES:
+        TEMPLATE_POOL.clear()
+        read = timed(Document, path, count)
+        pooled = timed(open_template, path, count)
+        print(
+            f"{path.name}: Document {read * 1000:.0f} ms,"
+            f" open_template {pooled * 1000:.0f} ms (including the first load),"
+            f" {read / pooled:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
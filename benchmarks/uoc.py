@@ -0,0 +1,147 @@
+"""Benchmark of fetching and parsing units of competency
+
+Serves the hand-written pages in tests/fixtures/uoc from a local training.gov.au
+stand-in with injected latency, then times every stage of the UnitOfCompetency
+pipeline: fetching (uncached, revalidated and cached), parsing (full and lean), the
+section index and each section/parse_* method.
+
+Run from the repo root: python -m benchmarks.uoc [--latency 0.3] [--number 20]
+"""
+
+from __future__ import annotations
+
+import statistics
+import tempfile
+import time
+
+from pathlib import Path
+from typing import Callable
+
+import typer
+
+from src.utils.uoc import (
+    UOCSections,
+    UnitOfCompetency,
+    UnitOfCompetencyCache,
+    build_session,
+    prefetch,
+)
+from src.utils import uoc as uoc_module
+from tests.tga_server import TrainingGovServer, load_pages
+
+PARSE_METHODS = [
+    "parse_knowledge_criteria",
+    "parse_performance_evidence",
+    "parse_assessment_conditions",
+]
+
+
+def measure(make: Callable[[], object], run: Callable[[object], object], number: int):
+    """
+    Median seconds of ``run`` over ``number`` fresh objects built (untimed) by ``make``.
+    """
+    timings = []
+    for _ in range(number):
+        subject = make()
+        start = time.perf_counter()
+        run(subject)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def stages(unit_code: str, html: str, cache_dir: Path) -> dict[str, tuple]:
+    """
+    (make, run) pairs for every stage timed for a unit.
+    """
+
+    def handle(cache=None, **kwargs):
+        return lambda: UnitOfCompetency(unit_code, cache=cache, **kwargs)
+
+    def parsed(index: bool):
+        # A handle with its page parsed and (optionally) indexed already
+        def make():
+            uoc = UnitOfCompetency(unit_code, html=html)
+            uoc._sections if index else uoc._soup
+            return uoc
+
+        return make
+
+    cold = lambda: UnitOfCompetencyCache(tempfile.mkdtemp(dir=cache_dir))
+    stale = UnitOfCompetencyCache(cache_dir / "stale", ttl=0)
+    fresh = UnitOfCompetencyCache(cache_dir / "fresh")
+    for cache in (stale, fresh):
+        cache.store(unit_code, UnitOfCompetency.base_url + unit_code, html)
+
+    result = {
+        "fetch (uncached)": (
+            lambda: UnitOfCompetency(unit_code, cache=cold()),
+            lambda u: u._page,
+        ),
+        "fetch (revalidated)": (handle(stale), lambda u: u._page),
+        "fetch (cached)": (handle(fresh), lambda u: u._page),
+        "parse (full)": (handle(html=html), lambda u: u._soup),
+        "parse (lean)": (handle(html=html, lean=True), lambda u: u._soup),
+        "section index": (parsed(index=False), lambda u: u._sections),
+    }
+    for section in UOCSections:
+        name = section.attribute_name
+        result[name] = (parsed(index=True), lambda u, name=name: getattr(u, name))
+    for method in PARSE_METHODS:
+        result[method] = (
+            parsed(index=True),
+            lambda u, method=method: getattr(u, method)(),
+        )
+    return result
+
+
+def main(
+    latency: float = typer.Option(0.3, help="Seconds added to every response"),
+    jitter: float = typer.Option(0.1, help="Maximum random extra seconds per response"),
+    bandwidth: int = typer.Option(
+        2_000_000, help="Bytes per second page bodies are sent at (0 = unlimited)"
+    ),
+    number: int = typer.Option(10, help="Repetitions of every stage"),
+):
+    """
+    Time fetching and parsing every fixture unit page.
+    """
+    pages = load_pages()
+    with (
+        TrainingGovServer(pages, latency, jitter, bandwidth) as server,
+        tempfile.TemporaryDirectory() as cache_dir,
+    ):
+        UnitOfCompetency.base_url = server.base_url
+        uoc_module.SESSION = build_session()
+        cache_dir = Path(cache_dir)
+
+        results = {
+            unit_code: {
+                stage: measure(make, run, number)
+                for stage, (make, run) in stages(unit_code, html, cache_dir).items()
+            }
+            for unit_code, html in pages.items()
+        }
+
+        names = list(next(iter(results.values())))
+        width = max(map(len, names))
+        print(
+            f"{'stage (median ms)':<{width}}  " + "  ".join(f"{u:>9}" for u in results)
+        )
+        for stage in names:
+            print(
+                f"{stage:<{width}}  "
+                + "  ".join(f"{results[u][stage] * 1000:9.2f}" for u in results)
+            )
+
+        for workers in (1, len(pages)):
+            cache = UnitOfCompetencyCache(tempfile.mkdtemp(dir=cache_dir))
+            start = time.perf_counter()
+            prefetch(pages, max_workers=workers, cache=cache)
+            print(
+                f"prefetch {len(pages)} units with {workers} worker(s):"
+                f" {(time.perf_counter() - start) * 1000:.0f} ms"
+            )
+
+
+if __name__ == "__main__":
+    typer.run(main)
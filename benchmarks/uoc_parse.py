@@ -0,0 +1,44 @@
+"""Microbenchmark of full vs lean parsing of the fixture unit pages
+
+Run from the repo root: python -m benchmarks.uoc_parse
+"""
+
+from pathlib import Path
+from timeit import repeat
+
+from src.utils.uoc import UnitOfCompetency
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures" / "uoc"
+
+
+def parse(unit_code: str, html: str, lean: bool):
+    uoc = UnitOfCompetency(unit_code, lean=lean, html=html)
+    uoc.parse_knowledge_criteria()
+    uoc.parse_performance_evidence()
+    uoc.parse_assessment_conditions()
+
+
+def time_parse(unit_code: str, html: str, lean: bool, number: int) -> float:
+    """
+    Best time in seconds of parsing a page and all its sections.
+    """
+    timings = repeat(lambda: parse(unit_code, html, lean), number=number, repeat=5)
+    return min(timings) / number
+
+
+def main(number: int = 50):
+    pages = {
+        path.stem: path.read_text(encoding="utf-8") for path in FIXTURES.glob("*.html")
+    }
+    print(f"{len(pages)} pages")
+    for unit_code, html in sorted(pages.items()):
+        full = time_parse(unit_code, html, False, number)
+        lean = time_parse(unit_code, html, True, number)
+        print(
+            f"{unit_code}: full {full * 1000:.2f} ms, lean {lean * 1000:.2f} ms"
+            f" ({full / lean:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,12 @@
 from pathlib import Path
 
-from requests import RequestException
-from src.lap import lap
-from src.assessment_tools import assess_tool
+import click
+from src.build import WORKERS, build
 from os import environ as env
-
-from src.mapping_matrix import mapping_matrix
 from src.utils.logger import log
+from src.utils.fragments import FRAGMENT_STORE
+from src.utils.markdown import MARKDOWN_CACHE
+from src.utils.uoc import CACHE
 
 assert "COURSE_CONTENT" in env, "COURSE_CONTENT is undefined"
 assert "OUTPUT_LOCATION" in env, "OUTPUT_LOCATION is undefined"
@@ -14,22 +14,30 @@ COURSE_CONTENT = Path(env["COURSE_CONTENT"]).resolve()
 OUTPUT_LOCATION = Path(env["OUTPUT_LOCATION"]).resolve()
 
 
-def generate_lap():
-    lap(COURSE_CONTENT, OUTPUT_LOCATION)
-
-
-def generate_assessments():
-    assess_tool(COURSE_CONTENT, OUTPUT_LOCATION)
-
-
-def generate_matrix():
-    mapping_matrix(COURSE_CONTENT, OUTPUT_LOCATION)
-
-
-def main():
-    generate_lap()
-    generate_assessments()
-    generate_matrix()
+@click.command()
+@click.argument("targets", nargs=-1)
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="Only use cached training.gov.au pages, never touch the network.",
+)
+@click.option(
+    "--force", is_flag=True, help="Regenerate documents even if nothing changed."
+)
+@click.option("--workers", default=WORKERS, help="Documents rendered at once")
+def main(targets: tuple[str, ...], offline: bool, force: bool, workers: int):
+    """
+    Build the course's documents, or only TARGETS: lap, tools, matrices or task names
+    and patterns such as tool:AT1* and matrix:ICTAII501.
+    """
+    if offline:
+        CACHE.offline = True
+    try:
+        build(COURSE_CONTENT, OUTPUT_LOCATION, targets, force, workers)
+    finally:
+        log.debug(f"Markdown cache: {MARKDOWN_CACHE.info()}")
+        if FRAGMENT_STORE is not None:
+            log.debug(f"Fragment store: {FRAGMENT_STORE.info()}")
 
 
 if __name__ == "__main__":
@@ -1,18 +1,22 @@
 import os
 from os import environ as env
 import click
-from docx import Document
+from concurrent.futures import ProcessPoolExecutor
 from docx.table import Table, _Cell, _Column
-from docx.styles.styles import Styles
 from docx.enum.style import WD_STYLE_TYPE, WD_BUILTIN_STYLE as WD_STYLE
 from docx.document import Document as _Document
 from docx.shared import Pt
 from docx.section import _Header, _Footer, Section, Sections
 from pathlib import Path
 from pandas import DataFrame
+from frontmatter import Post
 
-from src.utils.markdown import markdown_to_word, parse_md
+from src.utils.markdown import engine_styles, markdown_to_word, parse_md
+from src.utils.styles import StyleResolver, document_styles
+from src.utils.templates import open_template
+from src.utils.manifest import engine_inputs, file_hash, markdown_inputs
 from src.utils.math import add_tuples
+from src.utils.logger import log
 
 
 os.environ["ROOT_DIR"] = str(Path(__file__).parent.parent.resolve())
@@ -35,6 +39,12 @@ OUTPUT_FILE = Path("Assessment Task Tool (F122A12).docx")
 # Relative Path of Content Files (Input and Output):
 ASSESSMENTS = Path("2 KAD/5 Assess Tool/")
 
+# Processes generating assessment tools at once, 0 or 1 generates them in turn
+WORKERS = int(env.get("ASSESS_TOOL_WORKERS", 0))
+
+# Bump when a change alters generated tools, so tools built before are rebuilt
+GENERATOR_VERSION = "1"
+
 
 import re
 from typing import List, Dict
@@ -80,128 +90,211 @@ def parse_markdown_headers(md_content: str) -> List[Dict[str, str]]:
     return sections
 
 
-def assess_tool(course_directory: Path, output_location: Path):
+class AssessmentToolErrors(Exception):
+    """
+    Assessment tools that could not be generated, the other tools were generated.
+    """
+
+    def __init__(self, errors: dict[Path, BaseException]):
+        super().__init__(errors)
+        self.errors = errors
+
+    def __str__(self):
+        return "\n".join(
+            f"{assessment}: {error!r}" for assessment, error in self.errors.items()
+        )
+
+
+def assess_tool(
+    course_directory: Path, output_location: Path, max_workers: int = WORKERS
+) -> list[Path]:
+    """
+    Generate the assessment tool of every assessment.md in the course.
+
+    :param max_workers: Processes generating tools at once, 0 or 1 generates them in turn.
+    :return: The tools generated.
+    :raises AssessmentToolErrors: after generating the other tools, if any failed.
+    """
     assert course_directory.is_dir()
     assert output_location.is_dir()
 
-    assessments = course_directory / ASSESSMENTS
-    for assessment in assessments.rglob("assessment.md"):
+    assessments = [
+        assessment
+        for assessment in (course_directory / ASSESSMENTS).rglob("assessment.md")
+        if assessment.is_file()
+    ]
+    outputs: list[Path] = []
+    errors: dict[Path, BaseException] = {}
+
+    if max_workers > 1 and len(assessments) > 1:
+        workers = min(max_workers, len(assessments))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                assessment: pool.submit(assessment_tool, assessment, output_location)
+                for assessment in assessments
+            }
+        for assessment, future in futures.items():
+            if (error := future.exception()) is not None:
+                errors[assessment] = error
+            else:
+                outputs.append(future.result())
+    else:
+        for assessment in assessments:
+            try:
+                outputs.append(assessment_tool(assessment, output_location))
+            except Exception as error:
+                errors[assessment] = error
+
+    for assessment, error in errors.items():
+        log.error(f"Assessment tool for {assessment} failed: {error!r}")
+    if errors:
+        raise AssessmentToolErrors(errors)
+    return outputs
+
+
+def tool_output(output_location: Path, assessment: Path) -> Path:
+    return output_location / ASSESSMENTS / Path(assessment.parent.name) / OUTPUT_FILE
+
+
+def tool_inputs(assessment: Path) -> dict:
+    """
+    What an assessment tool is generated from: its assessment.md (and images), the
+    template, the markdown engine and this generator's version.
+    """
+    return {
+        "generator": f"assessment_tools {GENERATOR_VERSION}",
+        "template": file_hash(Path(ROOT) / TEMPLATE),
+        **engine_inputs(),
+        **markdown_inputs(assessment),
+    }
 
-        doc: _Document = Document(ROOT / TEMPLATE)
-        styles: Styles = doc.styles
 
-        output: Path = (
-            output_location / ASSESSMENTS / Path(assessment.parent.name) / OUTPUT_FILE
-        )
-        if not assessment.is_file():
-            continue
+def assessment_tool(
+    assessment: Path, output_location: Path, markdown: Post | None = None
+) -> Path:
+    """
+    Generate the assessment tool of one assessment.md.
 
-        markdown = parse_md(assessment)
+    :param markdown: The assessment already parsed, parsed here if not given.
+    :return: The tool generated.
+    """
+    doc: _Document = open_template(ROOT / TEMPLATE)
+    # Fail before rendering anything if the template lacks a style we use
+    styles: StyleResolver = document_styles(doc).require(
+        (*engine_styles(), "Grid Table 7 Colorful")
+    )
 
-        sections = parse_markdown_headers(markdown.content)
-
-        for idx, section in enumerate(sections):
-            table_number = 1 + idx
-            table: Table = doc.tables[table_number - 1]
-
-            cell: _Cell = table.cell(0, 0)
-            cell.text = ""
-            markdown_to_word(section.get("content", ""), doc, cell)
-
-        for checklist in markdown.get("observation_checklist", []) or []:
-            doc.add_page_break()
-            doc.add_heading("Observation Checklist", 2)
-            header = markdown.get("observation_checklist_header", "") or ""
-            # doc.add_paragraph(header)
-            footer = markdown.get("observation_checklist_footer", "") or ""
-            table = doc.add_table(
-                1, len(checklist.keys()), styles["Grid Table 7 Colorful"]
-            )
-            table.autofit = True
-            row = table.add_row()
-            for column_idx, column in enumerate(checklist.keys()) or []:
-                # _column: _Column = table.columns[column_idx]
-                table.cell(*(0, column_idx)).text = column
-
-                rows = checklist.get(column) or []
-
-                for row_idx, value in enumerate(rows):
-                    if table.rows is None:
-                        pass
-                    if value is None:
-                        value = ""
-                    if row_idx + 1 >= len(table.rows):
-                        table.add_row()
-                    table.cell(*(row_idx + 1, column_idx)).text = value
-
-            # doc.add_paragraph(footer)
-
-        for checklist in markdown.get("marking_checklist", []) or []:
-            doc.add_page_break()
-            doc.add_heading("Marking Checklist", 2)
-            table = doc.add_table(0, 0, styles["Grid Table 7 Colorful"])
-            table.autofit = True
-            row = table.add_row()
-            for column_idx, column in enumerate(checklist.keys()) or []:
-                _column: _Column = table.add_column(20)
-                table.cell(*(0, column_idx)).text = column
-
-                rows = checklist.get(column) or []
-
-                for row_idx, value in enumerate(rows):
-                    if table.rows is None:
-                        pass
-                    if value is None:
-                        value = ""
-                    if row_idx + 1 >= len(table.rows):
-                        table.add_row()
-                    table.cell(*(row_idx + 1, column_idx)).text = value
-
-        header: _Header = doc.sections[0].header
-        table_header: Table = header.tables[0]
-
-        cell: _Cell = table_header.cell(1, 1)
-        cell.text = "\n".join(
-            (f'{unit.get("id")} {unit.get("name")}' for unit in markdown.get("units"))
-        )
+    output: Path = tool_output(output_location, assessment)
 
-        cell: _Cell = table_header.cell(0, 1)
-        cell.text = f'{markdown.get("qualification_national_code_and_title")}'
+    if markdown is None:
+        markdown = parse_md(assessment)
 
-        # sections: Sections = doc.sections
-        # section: Section = doc.sections[0]
-        # for section in doc.sections:
-        #     for paragraph in section.footer.paragraphs:
-        #         print(paragraph.text)
-        # footer: _Footer = section.footer
+    sections = parse_markdown_headers(markdown.content)
 
-        # end_early = False
-        # paragraphs = footer.paragraphs
+    for idx, section in enumerate(sections):
+        table_number = 1 + idx
+        table: Table = doc.tables[table_number - 1]
 
-        # for run in (run for paragraph in footer.paragraphs for run in paragraph.runs):
-        #     search_string = "Assessment task last updated:"
-        #     if search_string in run.text:
-        #         text: str = run.text
-        #         run.text = (
-        #             text[: text.index(search_string) + len(search_string)]
-        #             + "04/06/24"
-        #             + text[text.index(search_string) + len(search_string) :]
-        #         )
-        #         end_early = True
-        #     if end_early == True:
-        #         break
+        cell: _Cell = table.cell(0, 0)
+        cell.text = ""
+        markdown_to_word(section.get("content", ""), doc, cell)
 
-        output.parent.mkdir(exist_ok=True, parents=True)
-        doc.save(output)
+    for checklist in markdown.get("observation_checklist", []) or []:
+        doc.add_page_break()
+        doc.add_heading("Observation Checklist", 2)
+        header = markdown.get("observation_checklist_header", "") or ""
+        # doc.add_paragraph(header)
+        footer = markdown.get("observation_checklist_footer", "") or ""
+        table = doc.add_table(
+            1, len(checklist.keys()), styles["Grid Table 7 Colorful"]
+        )
+        table.autofit = True
+        row = table.add_row()
+        for column_idx, column in enumerate(checklist.keys()) or []:
+            # _column: _Column = table.columns[column_idx]
+            table.cell(*(0, column_idx)).text = column
+
+            rows = checklist.get(column) or []
+
+            for row_idx, value in enumerate(rows):
+                if table.rows is None:
+                    pass
+                if value is None:
+                    value = ""
+                if row_idx + 1 >= len(table.rows):
+                    table.add_row()
+                table.cell(*(row_idx + 1, column_idx)).text = value
+
+        # doc.add_paragraph(footer)
+
+    for checklist in markdown.get("marking_checklist", []) or []:
+        doc.add_page_break()
+        doc.add_heading("Marking Checklist", 2)
+        table = doc.add_table(0, 0, styles["Grid Table 7 Colorful"])
+        table.autofit = True
+        row = table.add_row()
+        for column_idx, column in enumerate(checklist.keys()) or []:
+            _column: _Column = table.add_column(20)
+            table.cell(*(0, column_idx)).text = column
+
+            rows = checklist.get(column) or []
+
+            for row_idx, value in enumerate(rows):
+                if table.rows is None:
+                    pass
+                if value is None:
+                    value = ""
+                if row_idx + 1 >= len(table.rows):
+                    table.add_row()
+                table.cell(*(row_idx + 1, column_idx)).text = value
+
+    header: _Header = doc.sections[0].header
+    table_header: Table = header.tables[0]
+
+    cell: _Cell = table_header.cell(1, 1)
+    cell.text = "\n".join(
+        (f'{unit.get("id")} {unit.get("name")}' for unit in markdown.get("units"))
+    )
+
+    cell: _Cell = table_header.cell(0, 1)
+    cell.text = f'{markdown.get("qualification_national_code_and_title")}'
+
+    # sections: Sections = doc.sections
+    # section: Section = doc.sections[0]
+    # for section in doc.sections:
+    #     for paragraph in section.footer.paragraphs:
+    #         print(paragraph.text)
+    # footer: _Footer = section.footer
+
+    # end_early = False
+    # paragraphs = footer.paragraphs
+
+    # for run in (run for paragraph in footer.paragraphs for run in paragraph.runs):
+    #     search_string = "Assessment task last updated:"
+    #     if search_string in run.text:
+    #         text: str = run.text
+    #         run.text = (
+    #             text[: text.index(search_string) + len(search_string)]
+    #             + "04/06/24"
+    #             + text[text.index(search_string) + len(search_string) :]
+    #         )
+    #         end_early = True
+    #     if end_early == True:
+    #         break
+
+    output.parent.mkdir(exist_ok=True, parents=True)
+    doc.save(output)
+    return output
 
 
 @click.command()
 # @click.argument("course_directory", type=click.Path(exists=True, path_type=Path))
-def run_cli():
+@click.option("--workers", default=WORKERS, help="Tools generated at once")
+def run_cli(workers: int):
     """
     CLI tool to write YAML header data from Markdown file to Word document as custom properties.
     """
-    assess_tool(COURSE_CONTENT, OUTPUT_LOCATION)
+    assess_tool(COURSE_CONTENT, OUTPUT_LOCATION, workers)
 
 
 if __name__ == "__main__":
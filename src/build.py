@@ -0,0 +1,289 @@
+"""A course's documents built as a graph of tasks, each run once its inputs are ready"""
+
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from functools import partial
+from graphlib import TopologicalSorter
+from os import environ as env
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from frontmatter import Post
+
+from src.assessment_tools import assessment_tool, tool_inputs, tool_output
+from src.lap import OUTPUT_FILE as LAP_FILE, lap, lap_inputs
+from src.mapping_matrix import (
+    MatrixResult,
+    MatrixUnit,
+    assessment_files,
+    build_matrix,
+    fetch_unit,
+    matrix_output,
+    record_matrices,
+    unit_mappings,
+)
+from src.utils.logger import log
+from src.utils.manifest import Manifest
+from src.utils.markdown import parse_md
+from src.utils.uoc import MAX_WORKERS
+
+# Processes rendering documents at once, 0 or 1 renders them one at a time in a thread
+# (units are still fetched meanwhile)
+WORKERS = int(env.get("BUILD_WORKERS", 0))
+
+# Targets selecting every document of a kind
+ALIASES = {"tools": "tool:*", "matrices": "matrix:*"}
+
+
+@dataclass
+class Task:
+    name: str
+    # Called with the results of the tasks it depends on, in order
+    run: Callable[..., Any]
+    deps: tuple[str, ...] = ()
+    # "io" tasks run in threads, "cpu" tasks in worker processes
+    kind: str = "cpu"
+    # The document rendered and its inputs, when they are known before running. The
+    # task is skipped if the manifest records the document with the same inputs.
+    output: Path | None = None
+    inputs: dict | None = None
+
+
+@dataclass
+class TaskRun:
+    results: dict[str, Any] = field(default_factory=dict)
+    errors: dict[str, BaseException] = field(default_factory=dict)
+    # Time each task took from its submission, including time spent queued
+    seconds: dict[str, float] = field(default_factory=dict)
+
+
+class BuildErrors(Exception):
+    """
+    Tasks that failed or were not run because a task they depend on failed.
+    """
+
+    def __init__(self, errors: dict[str, BaseException]):
+        super().__init__(errors)
+        self.errors = errors
+
+    def __str__(self):
+        return "\n".join(f"{name}: {error!r}" for name, error in self.errors.items())
+
+
+@dataclass
+class Course:
+    """
+    The course's parsed assessments, shared by the assessment tools and matrices.
+    """
+
+    directory: Path
+    assessments: dict[Path, Post]
+
+    @classmethod
+    def read(cls, directory: Path) -> "Course":
+        return cls(
+            directory, {path: parse_md(path) for path in assessment_files(directory)}
+        )
+
+    @property
+    def units(self) -> dict[str, dict]:
+        return unit_mappings(self.assessments)
+
+
+def render_unit_matrix(
+    id: str,
+    mapping_matrix: dict,
+    output: Path,
+    previous: dict,
+    force: bool,
+    unit_data: MatrixUnit,
+) -> MatrixResult:
+    # The fetched unit is the result of the task this one depends on, so comes last
+    return build_matrix(id, mapping_matrix, unit_data, output, previous, force)
+
+
+def documents(
+    course: Course, output_location: Path, manifest: Manifest, force: bool = False
+) -> list[Task]:
+    """
+    Tasks rendering every document of the course, and fetching the units they need.
+    """
+    tasks = [
+        Task(
+            "lap",
+            partial(lap, course.directory, output_location),
+            output=output_location / LAP_FILE,
+            inputs=lap_inputs(course.directory),
+        )
+    ]
+    for path, markdown in course.assessments.items():
+        tasks.append(
+            Task(
+                f"tool:{path.parent.name}",
+                partial(assessment_tool, path, output_location, markdown),
+                output=tool_output(output_location, path),
+                inputs=tool_inputs(path),
+            )
+        )
+    # A matrix's inputs include its unit's content, so matrices check the manifest
+    # themselves once their unit is fetched
+    for id, mapping_matrix in course.units.items():
+        tasks.append(Task(f"unit:{id}", partial(fetch_unit, id), kind="io"))
+        tasks.append(
+            Task(
+                f"matrix:{id}",
+                partial(
+                    render_unit_matrix,
+                    id,
+                    mapping_matrix,
+                    matrix_output(output_location, id),
+                    manifest.get(matrix_output(output_location, id)),
+                    force,
+                ),
+                deps=(f"unit:{id}",),
+            )
+        )
+    return tasks
+
+
+def select(tasks: Iterable[Task], targets: Iterable[str] = ()) -> dict[str, Task]:
+    """
+    The tasks matching any of the targets (task names or patterns such as
+    ``matrix:ICTAII5*``, or ``tools`` and ``matrices``) and the tasks they depend on.
+    Every task if no target is given.
+
+    :raises ValueError: if a target matches no task.
+    """
+    tasks = {task.name: task for task in tasks}
+    targets = [ALIASES.get(target, target) for target in targets]
+    if not targets:
+        return tasks
+    selected: dict[str, Task] = {}
+    for target in targets:
+        matches = [name for name in tasks if fnmatch(name, target)]
+        if not matches:
+            raise ValueError(f"Target '{target}' matches none of {', '.join(tasks)}")
+        stack = matches
+        while stack:
+            name = stack.pop()
+            if name not in selected:
+                selected[name] = tasks[name]
+                stack.extend(tasks[name].deps)
+    # In the order the tasks were planned
+    return {name: task for name, task in tasks.items() if name in selected}
+
+
+def run_tasks(tasks: dict[str, Task], max_workers: int = WORKERS) -> TaskRun:
+    """
+    Run tasks as soon as the tasks they depend on are done, I/O in threads and
+    rendering in up to ``max_workers`` processes at the same time.
+
+    A task that fails doesn't stop the others, tasks depending on it are not run.
+    """
+    for task in tasks.values():
+        if unknown := [dep for dep in task.deps if dep not in tasks]:
+            raise ValueError(f"{task.name} depends on unknown task(s) {unknown}")
+    sorter = TopologicalSorter({name: task.deps for name, task in tasks.items()})
+    sorter.prepare()
+
+    run = TaskRun()
+    running: dict[Future, tuple[str, float]] = {}
+    cpu_pool: Executor = (
+        ProcessPoolExecutor(max_workers=max_workers)
+        if max_workers > 1
+        else ThreadPoolExecutor(max_workers=1)
+    )
+    io_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    with cpu_pool, io_pool:
+        if isinstance(cpu_pool, ProcessPoolExecutor):
+            # Start the worker processes before any I/O thread, forking while other
+            # threads hold locks can deadlock the workers
+            cpu_pool.submit(int).result()
+        while sorter.is_active():
+            for name in sorter.get_ready():
+                task = tasks[name]
+                if failed := [dep for dep in task.deps if dep in run.errors]:
+                    run.errors[name] = RuntimeError(f"not run, {failed[0]} failed")
+                    sorter.done(name)
+                    continue
+                pool = io_pool if task.kind == "io" else cpu_pool
+                future = pool.submit(task.run, *(run.results[dep] for dep in task.deps))
+                running[future] = (name, time.perf_counter())
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, start = running.pop(future)
+                run.seconds[name] = time.perf_counter() - start
+                if (error := future.exception()) is not None:
+                    run.errors[name] = error
+                else:
+                    run.results[name] = future.result()
+                sorter.done(name)
+    return run
+
+
+def build(
+    course_directory: Path,
+    output_location: Path,
+    targets: Iterable[str] = (),
+    force: bool = False,
+    max_workers: int = WORKERS,
+) -> TaskRun:
+    """
+    Build the selected documents of a course (every document if no target is given).
+
+    :param targets: See select, e.g. ``["matrix:ICTAII501"]`` for one unit's matrix.
+    :param force: Render documents even if their inputs are unchanged.
+    :param max_workers: Processes rendering documents at once.
+    :raises BuildErrors: after building the other documents, if any task failed.
+    """
+    assert course_directory.is_dir()
+    assert output_location.is_dir()
+
+    start = time.perf_counter()
+    # The assessments decide which tools and matrices there are, so they are read first
+    course = Course.read(course_directory)
+    manifest = Manifest(output_location)
+    tasks = select(documents(course, output_location, manifest, force), targets)
+    if not force:
+        # Only documents are skipped, no task depends on them
+        for name, task in list(tasks.items()):
+            if task.inputs is not None and manifest.is_current(
+                task.output, task.inputs
+            ):
+                log.info(f"Skipping {name}, its inputs are unchanged")
+                del tasks[name]
+    log.info(f"Building {', '.join(tasks)}")
+    run = run_tasks(tasks, max_workers)
+
+    for name, task in tasks.items():
+        if task.inputs is not None and name in run.results:
+            manifest.record(task.output, task.inputs)
+    matrices = [
+        result for result in run.results.values() if isinstance(result, MatrixResult)
+    ]
+    record_matrices(manifest, matrices, time.perf_counter() - start)
+    manifest.save()
+    for name, error in run.errors.items():
+        log.error(f"{name} failed: {error!r}")
+    log.info(
+        f"Built {len(run.results)} of {len(tasks)} tasks in"
+        f" {time.perf_counter() - start:.2f}s: "
+        + ", ".join(
+            f"{name} {seconds:.2f}s"
+            for name, seconds in sorted(run.seconds.items(), key=lambda item: -item[1])
+        )
+    )
+    if run.errors:
+        raise BuildErrors(run.errors)
+    return run
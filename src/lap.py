@@ -1,16 +1,23 @@
 import os
 from os import environ as env
 import click
-from docx import Document
 from docx.table import Table, _Cell
-from docx.styles.styles import Styles
 from docx.shared import Pt
 from pathlib import Path
 from pandas import DataFrame
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
 
-from src.utils.markdown import markdown_to_word, parse_md
+from src.utils.markdown import (
+    MARKDOWN_WORKERS,
+    engine_styles,
+    markdown_to_word,
+    parse_md,
+    render_fragments,
+)
+from src.utils.styles import StyleResolver, document_styles
+from src.utils.templates import open_template
+from src.utils.manifest import engine_inputs, file_hash, markdown_inputs
 from src.utils.math import add_tuples
 
 from src.utils.logger import log
@@ -38,6 +45,9 @@ ACTIVITIES = Path("2 KAD/1 LAP/activities.md")
 RESOURCES = Path("2 KAD/1 LAP/resources.md")
 ELEMENTS = Path("2 KAD/1 LAP/elements.md")
 
+# Bump when a change alters generated LAPs, so LAPs built before are rebuilt
+GENERATOR_VERSION = "1"
+
 
 import re
 from typing import List, Dict
@@ -86,12 +96,31 @@ def parse_markdown_headers(md_content:str) -> List[Dict[str, str]]:
 
 
 
+def lap_inputs(course_directory: Path) -> dict:
+    """
+    What the LAP is generated from: the LAP markdown files (and their images), the
+    template, the markdown engine and this generator's version.
+    """
+    return {
+        "generator": f"lap {GENERATOR_VERSION}",
+        "template": file_hash(Path(ROOT) / TEMPLATE),
+        **engine_inputs(),
+        **markdown_inputs(
+            *(
+                course_directory / path
+                for path in (FIELDS, TOPICS, ELEMENTS, RESOURCES, ACTIVITIES)
+            )
+        ),
+    }
+
+
 def lap(course_directory: Path, output_location: Path):
     assert course_directory.is_dir()
     assert output_location.is_dir()
     
-    doc = Document(ROOT / TEMPLATE)
-    styles: Styles = doc.styles
+    doc = open_template(ROOT / TEMPLATE)
+    # Fail before rendering anything if the template lacks a style we use
+    styles: StyleResolver = document_styles(doc).require(engine_styles())
 
     output_location.mkdir(parents=True, exist_ok=True)
 
@@ -185,6 +214,15 @@ def lap(course_directory: Path, output_location: Path):
     activities = parse_md(course_directory / ACTIVITIES).content.split("---")
     
     topics = parse_markdown_headers(parsed_md.content)
+    # Render the cells' markdown in worker processes, markdown_to_word then only adds it
+    fragments = None
+    if MARKDOWN_WORKERS > 1:
+        fragments = render_fragments(
+            [topic.get("content") for topic in topics]
+            + resources[: len(topics)]
+            + activities[: len(topics)],
+            ROOT / TEMPLATE,
+        )
     hours_coords = (2, 1)
     element_coords = (2, 2)
     topic_coords = (2, 3)
@@ -199,8 +237,8 @@ def lap(course_directory: Path, output_location: Path):
         cell: _Cell = table.cell(*coords)
         cell.text = ""
         cell.paragraphs[-1].text = topic.get("header") 
-        cell.paragraphs[-1].style = styles[f"Heading {topic.get("level", 1)}"] 
-        markdown_to_word(topic.get("content"), doc, cell)
+        styles.apply(cell.paragraphs[-1], f"Heading {topic.get("level", 1)}")
+        markdown_to_word(topic.get("content"), doc, cell, fragments=fragments)
         
         # Populate Session Hours
         coords = add_tuples(POINTER, hours_coords)
@@ -265,12 +303,12 @@ def lap(course_directory: Path, output_location: Path):
         # for resource in resources:
         coords = add_tuples(POINTER, resources_coords)
         cell: _Cell = table.cell(*coords)
-        markdown_to_word(resources[idx], doc, cell)
+        markdown_to_word(resources[idx], doc, cell, fragments=fragments)
         
         # Out of Class Activities
         coords = add_tuples(POINTER, activities_coords)
         cell: _Cell = table.cell(*coords)
-        markdown_to_word(activities[idx], doc, cell)
+        markdown_to_word(activities[idx], doc, cell, fragments=fragments)
 
         
         table.cell(*(22, 1)).text = str(parsed_md.get("total_session_hours"))
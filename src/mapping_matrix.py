@@ -1,11 +1,13 @@
 from itertools import chain
 import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from os import environ as env
 import click
-from docx import Document
 from docx.shared import Pt, Inches
 from docx.table import Table, _Cell, _Column
-from docx.styles.styles import Styles
 from docx.styles.style import _ParagraphStyle
 from docx.enum.style import WD_STYLE_TYPE, WD_BUILTIN_STYLE as WD_STYLE
 from docx.enum.table import WD_ALIGN_VERTICAL
@@ -16,9 +18,13 @@ from docx.text.paragraph import Paragraph
 from pathlib import Path
 from pandas import DataFrame
 
-from src.utils.markdown import markdown_to_word, parse_md
+from src.utils.markdown import markdown_to_word, parse_md, thaw
+from src.utils.styles import StyleResolver, document_styles
+from src.utils.templates import open_template
+from src.utils.manifest import Manifest, file_hash, markdown_inputs
 from src.utils.math import add_tuples
-from src.utils.uoc import UnitOfCompetency
+from src.utils.uoc import CACHE, MAX_WORKERS, UnitOfCompetency
+from src.utils.logger import log
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from frontmatter import Post
 
@@ -46,6 +52,11 @@ OUTPUT_FILE = Path("Assessment Mapping Matrix (F122A8).docx")
 # Relative Path of Content Files (Input and Output):
 ASSESSMENTS = Path("2 KAD/5 Assess Tool/")
 MAPPING_MATRIX = Path("2 KAD/7 Assess Mapping Matrix/")
+# Bump when a change alters generated matrices, so matrices built before are rebuilt
+GENERATOR_VERSION = "1"
+
+# Processes rendering mapping matrices at once, 0 or 1 renders them in turn
+WORKERS = int(env.get("MAPPING_MATRIX_WORKERS", 0))
 
 
 import re
@@ -92,19 +103,93 @@ def parse_markdown_headers(md_content: str) -> List[Dict[str, str]]:
     return sections
 
 
-def mapping_matrix(course_directory: Path, output_location: Path):
-    assert course_directory.is_dir()
-    assert output_location.is_dir()
+def matrix_inputs(id: str, paths: List[Path], unit_data: "MatrixUnit") -> dict:
+    """
+    What a unit's matrix is generated from: the unit's training.gov.au content, its
+    assessment.md files, the template and this generator's version.
+    """
+    return {
+        "generator": f"mapping_matrix {GENERATOR_VERSION}",
+        "template": file_hash(Path(ROOT) / TEMPLATE),
+        f"unit:{id}": unit_data.content_hash,
+        **markdown_inputs(*paths),
+    }
 
-    assessments = course_directory / ASSESSMENTS
-    unit_assessment_mapping = {}
 
-    for assessment in sorted(assessments.rglob("assessment.md")):
-        if not assessment.is_file():
-            continue
+@dataclass
+class MatrixUnit:
+    """
+    What a mapping matrix needs from a unit of competency, parsed before rendering.
+    """
+
+    elements_and_criteria: dict[str, str]
+    knowledge_criteria: dict[str, list[str]]
+    performance_evidence: dict[str, list[str]]
+    assessment_conditions: dict[str, list[str]]
+    # Hash of the unit's training.gov.au content, see UnitOfCompetency.content_hash
+    content_hash: str = ""
+
+    @classmethod
+    def from_uoc(cls, uoc: UnitOfCompetency) -> "MatrixUnit":
+        return cls(
+            uoc.data.elements_and_criteria,
+            uoc.parse_knowledge_criteria(),
+            uoc.parse_performance_evidence(),
+            uoc.parse_assessment_conditions(),
+            uoc.content_hash,
+        )
+
+
+def fetch_unit(unit_code: str) -> MatrixUnit:
+    """
+    Fetch (or read from the cache) and parse what a matrix needs from a unit.
+    """
+    return MatrixUnit.from_uoc(UnitOfCompetency(unit_code))
+
+
+@dataclass
+class MatrixResult:
+    id: str
+    output: Path
+    # Time spent rendering and saving the matrix
+    seconds: float
+    # Python warnings raised while rendering
+    warnings: list[str] = field(default_factory=list)
+    # What the matrix was generated from, see matrix_inputs
+    inputs: dict = field(default_factory=dict)
+    # The matrix was already generated from the same inputs
+    skipped: bool = False
+
+
+class MappingMatrixErrors(Exception):
+    """
+    Units whose mapping matrix could not be generated, the others were generated.
+    """
+
+    def __init__(self, errors: dict[str, BaseException]):
+        super().__init__(errors)
+        self.errors = errors
 
-        markdown = parse_md(assessment)
+    def __str__(self):
+        return "\n".join(f"{id}: {error!r}" for id, error in self.errors.items())
 
+
+def assessment_files(course_directory: Path) -> list[Path]:
+    """
+    The course's assessment.md files, in a stable order.
+    """
+    assessments = (course_directory / ASSESSMENTS).rglob("assessment.md")
+    return [assessment for assessment in sorted(assessments) if assessment.is_file()]
+
+
+def unit_mappings(assessments: dict[Path, Post]) -> dict[str, dict]:
+    """
+    The unit, qualification and assessments (parsed and their paths) of every unit
+    the given assessments are mapped to.
+    """
+    unit_assessment_mapping = {}
+
+    for assessment, markdown in assessments.items():
         name = markdown.get("name")
         units = markdown.get("units")
 
@@ -114,18 +199,176 @@ def mapping_matrix(course_directory: Path, output_location: Path):
                 unit["id"],
                 {
                     "assessments": [],
-                    "unit": unit,
+                    # Sent to worker processes, read only mappings can't be pickled
+                    "unit": thaw(unit),
                     "qualification": markdown.get(
                         "qualification_national_code_and_title"
                     ),
+                    "paths": [],
                 },
             )
             ## add assessment to unit mapping matrix
             unit_assessment_mapping.get(unit["id"]).get("assessments").append(markdown)
+            unit_assessment_mapping.get(unit["id"]).get("paths").append(assessment)
+
+    return unit_assessment_mapping
+
+
+def matrix_output(output_location: Path, id: str) -> Path:
+    return output_location / MAPPING_MATRIX / (id + " " + str(OUTPUT_FILE))
+
+
+def build_matrix(
+    id: str,
+    mapping_matrix: dict,
+    unit_data: MatrixUnit,
+    output: Path,
+    previous: dict,
+    force: bool = False,
+) -> MatrixResult:
+    """
+    Render a unit's mapping matrix, unless it was generated from the same inputs
+    (``previous``, see matrix_inputs) and ``force`` is not set.
+    """
+    current = matrix_inputs(id, mapping_matrix.get("paths"), unit_data)
+    messages = []
+    if previous.get(f"unit:{id}") not in (None, unit_data.content_hash):
+        messages.append(f"{id} content on training.gov.au has changed since last run")
+    if not force and output.is_file() and previous == current:
+        log.info(f"Skipping {id} mapping matrix, unit and assessments unchanged")
+        return MatrixResult(id, output, 0, messages, current, skipped=True)
+    result = render_matrix(id, mapping_matrix, unit_data, output)
+    result.warnings[:0] = messages
+    result.inputs = current
+    return result
+
+
+def record_matrices(manifest: Manifest, results: list[MatrixResult], seconds: float):
+    """
+    Record the inputs of the given matrices in the manifest, then log their warnings
+    and how long each took.
+    """
+    for result in results:
+        manifest.record(result.output, result.inputs)
+
+    for result in results:
+        for message in result.warnings:
+            log.warning(message)
+    if rendered := [result for result in results if not result.skipped]:
+        log.info(
+            f"Rendered {len(rendered)} mapping matrices in {seconds:.2f}s: "
+            + ", ".join(
+                f"{result.id} {result.seconds:.2f}s"
+                for result in sorted(rendered, key=lambda result: -result.seconds)
+            )
+        )
+
 
-    for unit_index, (id, mapping_matrix) in enumerate(unit_assessment_mapping.items()):
-        doc: _Document = Document(ROOT / TEMPLATE)
-        styles: Styles = doc.styles
+def mapping_matrix(
+    course_directory: Path,
+    output_location: Path,
+    force: bool = False,
+    max_workers: int = WORKERS,
+) -> list[MatrixResult]:
+    """
+    Generate a mapping matrix for every unit referenced by the course's assessments.
+
+    Matrices whose unit content and assessments are unchanged since they were last
+    generated are skipped unless ``force`` is set.
+
+    :param max_workers: Processes rendering matrices at once, 0 or 1 renders in turn.
+    :return: The matrices generated.
+    :raises MappingMatrixErrors: after generating the other matrices, if any failed.
+    """
+    assert course_directory.is_dir()
+    assert output_location.is_dir()
+
+    unit_assessment_mapping = unit_mappings(
+        {path: parse_md(path) for path in assessment_files(course_directory)}
+    )
+
+    workers = min(max_workers, len(unit_assessment_mapping))
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        if pool is not None:
+            # Start the worker processes before any fetching thread, forking while
+            # other threads hold locks can deadlock the workers
+            pool.submit(int).result()
+
+        # Fetch every referenced unit up front rather than one at a time while
+        # rendering, a unit that can't be fetched or parsed only fails its own matrix
+        errors: dict[str, BaseException] = {}
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(MAX_WORKERS, len(unit_assessment_mapping)))
+        ) as fetcher:
+            units = {
+                id: fetcher.submit(fetch_unit, id) for id in unit_assessment_mapping
+            }
+        manifest = Manifest(output_location)
+
+        jobs = {}
+        for id, mapping_matrix in unit_assessment_mapping.items():
+            if (error := units[id].exception()) is not None:
+                errors[id] = error
+                continue
+            jobs[id] = (
+                id,
+                mapping_matrix,
+                units[id].result(),
+                matrix_output(output_location, id),
+                manifest.get(matrix_output(output_location, id)),
+                force,
+            )
+
+        start = time.perf_counter()
+        results: list[MatrixResult] = []
+
+        if pool is not None:
+            futures = {
+                id: pool.submit(build_matrix, *args) for id, args in jobs.items()
+            }
+            for id, future in futures.items():
+                if (error := future.exception()) is not None:
+                    errors[id] = error
+                else:
+                    results.append(future.result())
+        else:
+            for id, args in jobs.items():
+                try:
+                    results.append(build_matrix(*args))
+                except Exception as error:
+                    errors[id] = error
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    record_matrices(manifest, results, time.perf_counter() - start)
+    manifest.save()
+    for id, error in errors.items():
+        log.error(f"Mapping matrix for {id} failed: {error!r}")
+    if errors:
+        raise MappingMatrixErrors(errors)
+    return [result for result in results if not result.skipped]
+
+
+def render_matrix(
+    id: str, mapping_matrix: dict, unit_data: MatrixUnit, output: Path
+) -> MatrixResult:
+    """
+    Render and save the mapping matrix of one unit.
+
+    Only uses what it is given, nothing is fetched, so it can run in a worker process.
+
+    :param id: The unit's national code.
+    :param mapping_matrix: The unit, qualification and assessments mapping the unit.
+    :param unit_data: The unit's criteria and evidence, fetched beforehand.
+    :param output: Where the matrix is saved.
+    """
+    start = time.perf_counter()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        doc: _Document = open_template(ROOT / TEMPLATE)
+        styles: StyleResolver = document_styles(doc).require(["Heading 3"])
 
         ## Header Formatting
 
@@ -143,10 +386,9 @@ def mapping_matrix(course_directory: Path, output_location: Path):
 
         ## Mapping Matrix
         table = doc.tables[0]
-        uoc: UnitOfCompetency = UnitOfCompetency(id)
 
         # Elements
-        elements: dict = uoc.data.elements_and_criteria
+        elements: dict = unit_data.elements_and_criteria
         for element_index, (element, criteria) in enumerate(elements.items()):
             element_header = next(
                 (
@@ -160,7 +402,7 @@ def mapping_matrix(course_directory: Path, output_location: Path):
                 table.cell(element_header + 1 + index, 0).text = criterium
 
         # Knowledge
-        knowledge_elements = uoc.parse_knowledge_criteria()
+        knowledge_elements = unit_data.knowledge_criteria
         knowledge_header = next(
             (
                 index
@@ -180,7 +422,7 @@ def mapping_matrix(course_directory: Path, output_location: Path):
                     paragraph.add_run(sub_element)
 
         # Performance Evidence
-        performance = uoc.parse_performance_evidence()
+        performance = unit_data.performance_evidence
         performance_header = next(
             (
                 index
@@ -201,7 +443,7 @@ def mapping_matrix(course_directory: Path, output_location: Path):
                     paragraph.add_run(sub_element)
 
         # Assessment Conditions
-        assessment_conditions = uoc.parse_assessment_conditions()
+        assessment_conditions = unit_data.assessment_conditions
         ac_header = next(
             (
                 index
@@ -254,7 +496,7 @@ def mapping_matrix(course_directory: Path, output_location: Path):
 
             # Set up columns
             paragraph.text = f"Assessment Task {assessment_index + 1}"
-            paragraph.style = doc.styles["Heading 3"]
+            styles.apply(paragraph, "Heading 3")
             paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
             # Set up Assessment Title
@@ -379,18 +621,34 @@ def mapping_matrix(course_directory: Path, output_location: Path):
 
         # TODO: Implement main disclosure statements
         # table.autofit = True
-        output: Path = output_location / MAPPING_MATRIX / (id + " " + str(OUTPUT_FILE))
         output.parent.mkdir(exist_ok=True, parents=True)
         doc.save(output)
+    return MatrixResult(
+        id,
+        output,
+        time.perf_counter() - start,
+        [f"{id}: {warning.message}" for warning in caught],
+    )
 
 
 @click.command()
 # @click.argument("course_directory", type=click.Path(exists=True, path_type=Path))
-def run_cli():
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="Only use cached training.gov.au pages, never touch the network.",
+)
+@click.option(
+    "--force", is_flag=True, help="Regenerate matrices even if nothing changed."
+)
+@click.option("--workers", default=WORKERS, help="Matrices rendered at once")
+def run_cli(offline: bool, force: bool, workers: int):
     """
     CLI tool to write YAML header data from Markdown file to Word document as custom properties.
     """
-    mapping_matrix(COURSE_CONTENT, OUTPUT_LOCATION)
+    if offline:
+        CACHE.offline = True
+    mapping_matrix(COURSE_CONTENT, OUTPUT_LOCATION, force, workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,145 @@
+"""On disk store of rendered markdown, reused across runs while text, templates and images are unchanged"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from os import environ as env
+from pathlib import Path
+from typing import NamedTuple
+
+# SQLite file rendered markdown is stored in, unset disables the store
+FRAGMENT_CACHE = env.get("MARKDOWN_FRAGMENT_CACHE")
+# Fragments stored longer ago are rendered again
+FRAGMENT_CACHE_TTL = float(env.get("MARKDOWN_FRAGMENT_CACHE_TTL", 30 * 24 * 60 * 60))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fragments (
+    key TEXT PRIMARY KEY,
+    xml BLOB NOT NULL,
+    -- json encoded lists
+    links TEXT NOT NULL,
+    images TEXT NOT NULL,
+    stored_at REAL NOT NULL
+);
+"""
+
+
+class Fragment(NamedTuple):
+    """
+    The paragraphs a markdown text was rendered to, without their document's relationships.
+    """
+
+    # Serialized w:p elements
+    xml: bytes
+    # Target of each w:hyperlink, in document order
+    links: list[str]
+    # Every image the text refers to with its file's stamp, None if it could not be found.
+    # The drawings in the XML are those of the images found, in this order.
+    images: list[tuple[str, list | None]]
+
+    @property
+    def pictures(self) -> list[str]:
+        return [path for path, stamp in self.images if stamp is not None]
+
+
+class FragmentInfo(NamedTuple):
+    hits: int
+    misses: int
+    stored: int
+
+
+def image_stamp(path: str) -> list | None:
+    """
+    Where an image file resolves to, its modification time and size. None if it is missing.
+    """
+    try:
+        resolved = Path(path).resolve()
+        stat = resolved.stat()
+    except OSError:
+        return None
+    return [str(resolved), stat.st_mtime_ns, stat.st_size]
+
+
+def fragment_key(*parts: str) -> str:
+    """
+    Key of a fragment, from e.g. the engine version, template styles and markdown text.
+    """
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+class FragmentStore:
+    """
+    SQLite database of rendered fragments by key.
+
+    A fragment is only returned while the image files it was rendered with are unchanged.
+    Connections are opened per process, so a store can be shared with worker processes.
+    """
+
+    def __init__(self, path: Path | str, ttl: float = FRAGMENT_CACHE_TTL):
+        self.path = path if path == ":memory:" else Path(path).expanduser()
+        self.ttl = ttl
+        self.hits = self.misses = 0
+        self._connection: sqlite3.Connection | None = None
+        self._pid: int | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            if self.path != ":memory:":
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._pid = os.getpid()
+            # A lost write only means rendering a fragment again
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+            with self._connection:
+                self._connection.execute(
+                    "DELETE FROM fragments WHERE stored_at < ?",
+                    (time.time() - self.ttl,),
+                )
+        return self._connection
+
+    def get(self, key: str) -> Fragment | None:
+        row = self.connection.execute(
+            "SELECT xml, links, images FROM fragments WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            fragment = Fragment(row[0], json.loads(row[1]), json.loads(row[2]))
+            if all(image_stamp(path) == stamp for path, stamp in fragment.images):
+                self.hits += 1
+                return fragment
+        self.misses += 1
+        return None
+
+    def put(self, key: str, fragment: Fragment):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO fragments VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    fragment.xml,
+                    json.dumps(fragment.links),
+                    json.dumps(fragment.images),
+                    time.time(),
+                ),
+            )
+
+    def info(self) -> FragmentInfo:
+        (stored,) = self.connection.execute("SELECT COUNT(*) FROM fragments").fetchone()
+        return FragmentInfo(self.hits, self.misses, stored)
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM fragments")
+        self.hits = self.misses = 0
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+FRAGMENT_STORE = FragmentStore(FRAGMENT_CACHE) if FRAGMENT_CACHE else None
@@ -0,0 +1,105 @@
+"""Pictures of generated Word documents, loaded once per process and stored once per document"""
+
+import weakref
+from copy import deepcopy
+from functools import lru_cache
+from io import BytesIO
+from os import environ as env
+from pathlib import Path
+
+from docx.image.image import Image
+from docx.opc.part import Part
+from docx.oxml.shape import CT_Inline
+from docx.shape import InlineShape
+from docx.text.run import Run
+
+# Number of image files kept in memory
+IMAGE_CACHE_SIZE = int(env.get("IMAGE_CACHE_SIZE", 64))
+
+
+@lru_cache(maxsize=IMAGE_CACHE_SIZE)
+def _read_image(path: Path, mtime_ns: int, size: int) -> Image:
+    return Image.from_file(str(path))
+
+
+def load_image(path: Path | str) -> Image:
+    """
+    An image file's bytes, type and dimensions, read again only when the file changes.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    return _read_image(path, stat.st_mtime_ns, stat.st_size)
+
+
+# By the root element of their part, which lives as long as the part. Parts compare by
+# name so can't be keys.
+_PART_IMAGES: "weakref.WeakKeyDictionary[object, PartImages]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class PartImages:
+    """
+    Pictures added to one document part (the body, a header, ...).
+
+    Each distinct image is stored in the package and related to the part once, and its
+    drawing XML is built once, later occurrences are copies with a new shape id.
+    """
+
+    def __init__(self, part: Part):
+        self.part = part
+        # Drawing of each image (by sha1) already added to the part
+        self._inlines: dict[str, CT_Inline] = {}
+        # Id after the last one given out, pictures may not be in the part yet
+        self._next_id = 0
+
+    def _shape_id(self) -> int:
+        # The part may have gained shapes added some other way since the last picture
+        shape_id = max(self.part.next_id, self._next_id)
+        self._next_id = shape_id + 1
+        return shape_id
+
+    def _inline(self, image: Image) -> CT_Inline:
+        if (inline := self._inlines.get(image.sha1)) is None:
+            # Like python-docx describe the stored image, it may be a copy already in
+            # the template
+            r_id, stored = self.part.get_or_add_image(BytesIO(image.blob))
+            cx, cy = stored.scaled_dimensions()
+            inline = CT_Inline.new_pic_inline(0, r_id, stored.filename, cx, cy)
+            self._inlines[image.sha1] = inline
+        return inline
+
+    def inline(self, path: Path | str) -> CT_Inline:
+        """
+        A new drawing of an image file at its native size, to be added to a run of the part.
+        """
+        inline = deepcopy(self._inline(load_image(path)))
+        shape_id = self._shape_id()
+        inline.docPr.id = shape_id
+        inline.docPr.name = f"Picture {shape_id}"
+        return inline
+
+    def add_picture(self, run: Run, path: Path | str) -> InlineShape:
+        """
+        Add an image file to a run at its native size, like Run.add_picture.
+        """
+        inline = self.inline(path)
+        run._r.add_drawing(inline)
+        return InlineShape(inline)
+
+
+def part_images(part: Part) -> PartImages:
+    """
+    The pictures of a document part, created on first use.
+    """
+    images = _PART_IMAGES.get(part.element)
+    if images is None:
+        images = _PART_IMAGES[part.element] = PartImages(part)
+    return images
+
+
+def add_picture(run: Run, path: Path | str) -> InlineShape:
+    """
+    Add an image file to a run, reusing the image already loaded or stored in the document.
+    """
+    return part_images(run.part).add_picture(run, path)
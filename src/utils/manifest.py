@@ -0,0 +1,95 @@
+"""Record of the inputs each generated document was built from, to skip unchanged ones"""
+
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+
+from src.utils import markdown
+from src.utils.fragments import image_stamp
+from src.utils.markdown import ENGINE_VERSIONS, MARKDOWN_STYLES
+
+# In the output folder
+MANIFEST = Path(".manifest.json")
+MANIFEST_VERSION = 1
+
+IMAGE = MARKDOWN_STYLES["image"]["regex"]
+
+
+@lru_cache(maxsize=256)
+def _file_hash(path: Path, mtime_ns: int, size: int) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def file_hash(path: Path | str) -> str | None:
+    """
+    Hash of a file's contents, computed again only when the file changes.
+    None if the file is missing.
+    """
+    try:
+        path = Path(path).resolve()
+        stat = path.stat()
+    except OSError:
+        return None
+    return _file_hash(path, stat.st_mtime_ns, stat.st_size)
+
+
+def markdown_inputs(*paths: Path) -> dict:
+    """
+    Hashes of markdown files, and the stamps of the images they show.
+    """
+    inputs = {}
+    for path in paths:
+        inputs[str(path)] = file_hash(path)
+        if inputs[str(path)] is not None:
+            for _, image in IMAGE.findall(path.read_text(encoding="utf-8")):
+                inputs[f"image:{image}"] = image_stamp(image)
+    return inputs
+
+
+def engine_inputs(engine: str | None = None) -> dict:
+    """
+    The markdown engine (and its version) documents are rendered with, defaults to
+    MARKDOWN_ENGINE. The backend is left out, both write the same XML.
+    """
+    engine = engine or markdown.MARKDOWN_ENGINE
+    return {"markdown_engine": f"{engine} {ENGINE_VERSIONS[engine]}"}
+
+
+class Manifest:
+    """
+    The inputs (e.g. markdown files, template, unit content and generator version) each
+    document in an output folder was last generated from, by path in the folder.
+    """
+
+    def __init__(self, output_location: Path):
+        self.output_location = output_location
+        self.path = output_location / MANIFEST
+        self.documents: dict[str, dict] = {}
+        if self.path.is_file():
+            manifest = json.loads(self.path.read_text())
+            # Documents recorded by another version are all generated again
+            if manifest.get("version") == MANIFEST_VERSION:
+                self.documents = manifest["documents"]
+
+    def _key(self, output: Path) -> str:
+        return output.relative_to(self.output_location).as_posix()
+
+    def get(self, output: Path) -> dict:
+        return self.documents.get(self._key(output), {})
+
+    def is_current(self, output: Path, inputs: dict) -> bool:
+        """
+        Whether the document exists and was generated from the same inputs.
+        """
+        return output.is_file() and self.get(output) == inputs
+
+    def record(self, output: Path, inputs: dict):
+        self.documents[self._key(output)] = inputs
+
+    def save(self):
+        manifest = {"version": MANIFEST_VERSION, "documents": self.documents}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        temporary.replace(self.path)
@@ -1,19 +1,167 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from functools import partial
+import hashlib
+from os import environ as env
 from pathlib import Path
 import re
+from threading import Lock
+import weakref
+from types import MappingProxyType
+from typing import NamedTuple
 from docx.shared import Pt, Inches
 from docx import Document
 from docx.oxml import OxmlElement
 from docx.oxml.shared import qn
+from docx.oxml import parse_xml
+from docx.oxml.text.paragraph import CT_P
+from lxml import etree
+from lxml.etree import SubElement
+from docx.text.font import Font
 from docx.text.paragraph import Paragraph
 import frontmatter
 from frontmatter import Post
+import markdown_it
+from markdown_it import MarkdownIt
+from markdown_it.token import Token
+
+from src.utils.fragments import (
+    FRAGMENT_STORE,
+    Fragment,
+    fragment_key,
+    image_stamp,
+)
+from src.utils.images import add_picture, part_images
+from src.utils.styles import REQUIRED_STYLES, StyleResolver, document_styles
 
 ## General Markdown functions
 
 
-def parse_md(path: Path) -> Post:
-    assert path.is_file()
-    assert path.exists()
+# Number of parsed markdown files kept in memory, 0 disables the cache
+MARKDOWN_CACHE_SIZE = int(env.get("MARKDOWN_CACHE_SIZE", 256))
+# Also compare file contents, catches edits that keep a file's size within its mtime resolution
+MARKDOWN_CACHE_HASH = env.get("MARKDOWN_CACHE_HASH", "").lower() in ("1", "true", "yes")
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """
+    Plain dicts and lists of frozen metadata.
+    """
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+class FrozenPost(Post):
+    """
+    Read only snapshot of a parsed markdown file, shared by every caller of parse_md.
+
+    Metadata dictionaries are read only mappings and lists are tuples.
+    """
+
+    def __init__(self, post: Post):
+        object.__setattr__(self, "content", post.content)
+        object.__setattr__(self, "metadata", _freeze(post.metadata))
+        object.__setattr__(self, "handler", post.handler)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read only")
+
+    def __setitem__(self, name, value):
+        raise TypeError(f"{type(self).__name__} is read only")
+
+    def __delitem__(self, name):
+        raise TypeError(f"{type(self).__name__} is read only")
+
+    def __reduce__(self):
+        # Read only mappings can't be pickled, so posts are sent to worker processes
+        # with plain metadata and frozen again
+        post = Post(self.content, self.handler)
+        post.metadata = thaw(self.metadata)
+        return FrozenPost, (post,)
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class MarkdownCache:
+    """
+    Bounded LRU cache of parsed markdown files.
+
+    Entries are keyed by path and only reused while the file's mtime and size (and
+    optionally a hash of its contents) are unchanged.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = MARKDOWN_CACHE_SIZE,
+        content_hash: bool = MARKDOWN_CACHE_HASH,
+    ):
+        self.maxsize = maxsize
+        self.content_hash = content_hash
+        self.hits = 0
+        self.misses = 0
+        self._posts: OrderedDict[Path, tuple[tuple, FrozenPost]] = OrderedDict()
+        self._lock = Lock()
+
+    def _stamp(self, path: Path) -> tuple:
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if self.content_hash:
+            stamp += (hashlib.sha256(path.read_bytes()).hexdigest(),)
+        return stamp
+
+    def get(self, path: Path) -> FrozenPost:
+        path = path.resolve()
+        stamp = self._stamp(path)
+        with self._lock:
+            cached = self._posts.get(path)
+            if cached and cached[0] == stamp:
+                self.hits += 1
+                self._posts.move_to_end(path)
+                return cached[1]
+            self.misses += 1
+
+        post = FrozenPost(_load_md(path))
+        if self.maxsize > 0:
+            with self._lock:
+                self._posts[path] = (stamp, post)
+                self._posts.move_to_end(path)
+                while len(self._posts) > self.maxsize:
+                    self._posts.popitem(last=False)
+        return post
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._posts))
+
+    def clear(self):
+        with self._lock:
+            self._posts.clear()
+            self.hits = self.misses = 0
+
+
+MARKDOWN_CACHE = MarkdownCache()
+
+
+def _load_md(path: Path) -> Post:
     # Load the markdown file and parse the front matter
     with open(path, "r", encoding="utf-8") as file:
         parsed_md = frontmatter.load(file)
@@ -21,150 +169,602 @@ def parse_md(path: Path) -> Post:
     return parsed_md
 
 
+def parse_md(path: Path) -> FrozenPost:
+    """
+    Parse a markdown file's front matter and content, comments removed.
+
+    Parsed files are cached (see MarkdownCache), the returned post is read only.
+    """
+    assert path.is_file()
+    assert path.exists()
+    return MARKDOWN_CACHE.get(path)
+
+
 ## Markdown to Word Style Mapping:
-## ! Warning: Avoid defining overlapping regex, this is not supported by current implementation (afaik)
-## ! It will lead to duplicated text.
+## Block styles (headings, bullets and line breaks) only match the marker at the start of a line,
+## the rest of the line is scanned once from left to right for inline styles (so e.g. a bullet can
+## contain bold text and links). Where inline patterns overlap the one listed first wins.
 ## Parsing markdown effectively is quite complex thus we have only implemented some of the basic syntax here
 ## Custom style mappings can be added as needed
 MARKDOWN_STYLES = {
-    "h1": {"regex": re.compile(r"^#{1} (.*)", re.MULTILINE), "style": "Heading 1"},
-    "h2": {"regex": re.compile(r"^#{2} (.*)", re.MULTILINE), "style": "Heading 2"},
-    "h3": {"regex": re.compile(r"^#{3} (.*)", re.MULTILINE), "style": "Heading 3"},
-    "h4": {"regex": re.compile(r"^#{4} (.*)", re.MULTILINE), "style": "Heading 4"},
-    "h5": {"regex": re.compile(r"^#{5} (.*)", re.MULTILINE), "style": "Heading 5"},
-    "h6": {"regex": re.compile(r"^#{6} (.*)", re.MULTILINE), "style": "Heading 6"},
-    "bold/italic": {
-        "regex": re.compile(r"(\*{1,2})([^*]*?)(\*{1,2})"),
-        "style": "bold/italic",
-    },
-    "code": {"regex": re.compile(r"`{3}([^`]*)`{3}"), "style": "code"},
+    "h1": {"regex": re.compile(r"^#{1} ", re.MULTILINE), "style": "Heading 1"},
+    "h2": {"regex": re.compile(r"^#{2} ", re.MULTILINE), "style": "Heading 2"},
+    "h3": {"regex": re.compile(r"^#{3} ", re.MULTILINE), "style": "Heading 3"},
+    "h4": {"regex": re.compile(r"^#{4} ", re.MULTILINE), "style": "Heading 4"},
+    "h5": {"regex": re.compile(r"^#{5} ", re.MULTILINE), "style": "Heading 5"},
+    "h6": {"regex": re.compile(r"^#{6} ", re.MULTILINE), "style": "Heading 6"},
     "bullets": {
-        "regex": re.compile(r"^([' ',\t]*)[*\-+]\s(.*)$", re.MULTILINE),
+        "regex": re.compile(r"^([' ',\t]*)[*\-+]\s", re.MULTILINE),
         "style": "List Bullet",
     },
     # "numbers": {
-    #     "regex": re.compile(r"^([' ',\t]*)\d{1,}\.\s(.*)$", re.MULTILINE),
+    #     "regex": re.compile(r"^([' ',\t]*)\d{1,}\.\s", re.MULTILINE),
     #     "style": "List Number",
     # },
-    "link": {"regex": re.compile(r"(?<!!)\[(.*)\]\((.*)\)")},
-    "image": {"regex": re.compile(r"!\[(.*)\]\((.*)\)")},
     "linebreak": {"regex": re.compile(r"^\-{3}$", re.MULTILINE)},
+    "bold/italic": {
+        "regex": re.compile(r"(\*{1,2})([^*]*?)(\*{1,2})"),
+        "style": "bold/italic",
+    },
+    "code": {"regex": re.compile(r"`{3}([^`]*)`{3}"), "style": "code"},
+    # Targets may contain balanced parentheses, e.g. wiki/Python_(programming_language)
+    "image": {"regex": re.compile(r"!\[(.*?)\]\(((?:[^()]|\([^()]*\))*)\)")},
+    "link": {"regex": re.compile(r"(?<!!)\[(.*?)\]\(((?:[^()]|\([^()]*\))*)\)")},
     # Add more patterns if needed, like lists, links, etc.
 }
 
+BLOCK_STYLES = ("h1", "h2", "h3", "h4", "h5", "h6", "bullets", "linebreak")
+# Every inline pattern starts with one of these, lines are only scanned where they occur
+INLINE_MARKERS = "*`!["
+# Lines containing these continue the current paragraph rather than starting a new one
+CONTINUATION_STYLES = {"code", "image", "link"}
+
+
+class Span(NamedTuple):
+    """
+    A markdown style matched in a line of text.
+    """
+
+    style: str  # markdown style id
+    start: int
+    end: int
+    groups: tuple  # the style's regex groups
+
+
+def _group_name(style: str) -> str:
+    return "_" + re.sub(r"\W", "_", style)
+
+
+def _compile_tokenizer(styles: dict, prefix: str = "") -> tuple[re.Pattern, dict]:
+    """
+    Combine the style patterns into one alternation of named groups.
+
+    :return: The tokenizer and a mapping of group name to (style, slice of its groups).
+    """
+    tokenizer = re.compile(
+        prefix
+        + "(?:"
+        + "|".join(
+            f"(?P<{_group_name(style)}>{info['regex'].pattern})"
+            for style, info in styles.items()
+        )
+        + ")",
+        re.MULTILINE,
+    )
+    groups = {
+        _group_name(style): (
+            style,
+            slice(
+                tokenizer.groupindex[_group_name(style)],
+                tokenizer.groupindex[_group_name(style)] + info["regex"].groups,
+            ),
+        )
+        for style, info in styles.items()
+    }
+    return tokenizer, groups
+
+
+BLOCK_TOKENIZER, BLOCK_GROUPS = _compile_tokenizer(
+    {style: MARKDOWN_STYLES[style] for style in BLOCK_STYLES}
+)
+INLINE_TOKENIZER, INLINE_GROUPS = _compile_tokenizer(
+    {
+        style: info
+        for style, info in MARKDOWN_STYLES.items()
+        if style not in BLOCK_STYLES
+    },
+    prefix=f"(?=[{re.escape(INLINE_MARKERS)}])",
+)
+
+
+def _span(match: re.Match, groups: dict) -> Span:
+    style, group_slice = groups[match.lastgroup]
+    return Span(style, match.start(), match.end(), match.groups()[group_slice])
 
-def apply_markdown_style(document, text, parent=None):
+
+def tokenize(line: str) -> list[Span]:
+    """
+    Split a line of markdown into styled spans in a single left-to-right pass.
+
+    :param line: A single line of markdown text.
+    :return: Non overlapping spans in order of appearance, a block style is always first.
+    """
+    spans = []
+    if block := BLOCK_TOKENIZER.match(line):
+        spans.append(_span(block, BLOCK_GROUPS))
+    for match in INLINE_TOKENIZER.finditer(line, block.end() if block else 0):
+        spans.append(_span(match, INLINE_GROUPS))
+    return spans
+
+
+def _last_paragraph(parent) -> Paragraph:
+    """
+    The last paragraph of a document or table cell.
+
+    Unlike parent.paragraphs[-1] this does not create a proxy for every paragraph, which
+    gets slow as a cell fills up.
+    """
+    container = getattr(parent, "_body", parent)  # Documents delegate to their body
+    p = next(container._element.iterchildren(qn("w:p"), reversed=True))
+    return Paragraph(p, container)
+
+
+def apply_markdown_style(document, text, parent=None, writer=None):
     """
     Apply Markdown styles to text within a given parent or a new paragraph in the document.
 
     :param document: docx Document object.
     :param text: Text string containing Markdown content.
     :param parent: Parent container for the text runs (like a table cell or paragraph).
+    :param writer: Output backend, defaults to a DocxWriter of the parent.
     :return: The paragraph to which the styles were applied.
     """
-    if parent is None:
-        parent = document
+    if writer is None:
+        writer = DocxWriter(document, parent)
 
-    def add_paragraph(style=None) -> Paragraph:
-        if parent is None:
-            return document.add_paragraph(style=style)
-        else:
-            return parent.add_paragraph(style=style)
-
-    def print_matches(text, sorted_matches):
-        # Variables to track lists and their levels
-        bullet_level = ""
+    # Write cursor, the paragraph lines are currently added to
+    paragraph = None
 
-        # If no parent is given, append a new paragraph to the document.
-        paragraph = document.paragraphs[-1] if parent is None else parent.paragraphs[-1]
+    def add_run(paragraph, text: str):
+        if text:
+            writer.add_run(paragraph, text)
 
-        # Keep track of the last match position.
+    for line in text.split("\n"):
+        spans = tokenize(line)
         last_idx = 0
-        last_style = None
 
-        for match, style, wstyle in sorted_matches:
-            # match: Regex match
-            # style: markdown style id
-            # wstyle: Correlated Word style (if exists) Must be Paragraph style
+        if spans and spans[0].style in BLOCK_STYLES:
+            block, spans = spans[0], spans[1:]
+            last_idx = block.end
+            wstyle = MARKDOWN_STYLES[block.style].get("style")
+
+            if block.style == "linebreak":
+                # We process line breaks as 10 empty paragraphs instead
+                for _ in range(10):
+                    paragraph = writer.add_paragraph()
+                continue
+            elif block.style == "bullets":
+                indentation = len(block.groups[0].replace("\t", "  ")) // 2
+                paragraph = writer.add_paragraph(
+                    f'{wstyle}{f" {indentation + 1}" if indentation > 0 else ""}'
+                )
+            else:
+                paragraph = writer.add_paragraph(wstyle)
+        elif any(span.style in CONTINUATION_STYLES for span in spans):
+            if paragraph is None:
+                paragraph = writer.last_paragraph()
+        else:
+            paragraph = writer.add_paragraph()
+
+        for span in spans:
+            # Add the text before the markdown pattern.
+            add_run(paragraph, line[last_idx : span.start])
+
+            # Add the styled text for the matched markdown pattern.
+            if span.style == "bold/italic":
+                writer.add_run(
+                    paragraph,
+                    span.groups[1],
+                    bold=len(span.groups[0]) == 2,
+                    italic=len(span.groups[0]) == 1,
+                )
+            elif span.style == "code":
+                writer.add_code(paragraph, span.groups[0])
+            elif span.style == "link":
+                writer.add_hyperlink(paragraph, span.groups[0], span.groups[1])
+                writer.add_run(paragraph, "\n")
+            elif span.style == "image":
+                writer.add_picture(paragraph, span.groups[1], span.groups[0])
+            else:
+                # Block styles only match at the start of a line
+                add_run(paragraph, line[span.start : span.end])
 
-            remaining: str = text[last_idx : match.start()]
+            last_idx = span.end
 
-            paragraph.add_run(remaining)
+        add_run(paragraph, line[last_idx:])
 
-            last_idx = match.start()
+    return paragraph
 
-            if style == "bullets":
 
-                indentation = len(match.group(1).replace("\t", "  ")) // 2
+## Token stream engine:
+## Renders the block/inline token stream of markdown-it-py (CommonMark) instead of matching each line,
+## this handles nested and numbered lists, multi line paragraphs and any mix of inline styles.
+MARKDOWN_IT = MarkdownIt("commonmark")
+NUMBERED_LIST_STYLE = "List Number"
 
-                paragraph = add_paragraph(
-                    style=f'{wstyle}{f" {indentation + 1}" if indentation > 0 else ""}'
-                )
-                paragraph.add_run(match.group(2))
-                last_idx = match.end()
-                last_style = style
 
+def _list_style(styles: StyleResolver, style: str, depth: int) -> str:
+    """
+    Word style of a list item nested `depth` lists deep, e.g. 'List Bullet 2'.
+    Falls back to the deepest level the template defines.
+    """
+    for level in range(depth, 1, -1):
+        if f"{style} {level}" in styles:
+            return f"{style} {level}"
+    return style
+
+
+def render_tokens(document, text, parent=None, writer=None):
+    """
+    Render Markdown through the markdown-it-py token stream into a given parent or the document.
+
+    :param document: docx Document object.
+    :param text: Text string containing Markdown content.
+    :param parent: Parent container for the paragraphs (like a table cell).
+    :param writer: Output backend, defaults to a DocxWriter of the parent.
+    :return: The last paragraph written.
+    """
+    if writer is None:
+        writer = DocxWriter(document, parent)
+
+    paragraph = None
+    # Stack of list styles, one per open (nested) list
+    lists = []
+    # Whether the current list item's first paragraph was written
+    item_started = False
+
+    for token in MARKDOWN_IT.parse(text):
+        if token.type == "heading_open":
+            paragraph = writer.add_paragraph(MARKDOWN_STYLES[token.tag]["style"])
+        elif token.type == "bullet_list_open":
+            lists.append(MARKDOWN_STYLES["bullets"]["style"])
+        elif token.type == "ordered_list_open":
+            lists.append(NUMBERED_LIST_STYLE)
+        elif token.type in ("bullet_list_close", "ordered_list_close"):
+            lists.pop()
+        elif token.type == "list_item_open":
+            item_started = False
+        elif token.type == "paragraph_open":
+            if lists and not item_started:
+                style = _list_style(writer.styles, lists[-1], len(lists))
+                item_started = True
             else:
-                # Add the text before the markdown pattern.
-                paragraph.add_run(text[last_idx : match.start()])
-
-                # Add the styled text for the matched markdown pattern.
-                if wstyle == "bold/italic":
-                    paragraph = add_paragraph()
-                    styled_run = paragraph.add_run(match.group(2))
-                    styled_run.bold = True if len(match.group(1)) == 2 else False
-                    styled_run.italic = True if len(match.group(1)) == 1 else False
-                elif wstyle == "code":
-                    styled_run = paragraph.add_run(match.group(1))
-                    styled_run.font.name = "Arial"
-                    styled_run.font.size = Pt(10)
-                elif style == "link":
-                    add_hyperlink(paragraph, match.group(1), match.group(2))
-                    paragraph.add_run("\n")
-
-                elif style == "image":
-                    try:
-                        paragraph.add_run().add_picture(match.group(2))
-                    except:
-                        paragraph.add_run(match.group(1))
-                elif style == "linebreak":
-                    # We process line breaks as 10 empty paragraphs instead
-                    for _ in range(10):
-                        paragraph = add_paragraph()
+                style = None
+            paragraph = writer.add_paragraph(style)
+        elif token.type == "hr":
+            # We process line breaks as 10 empty paragraphs instead
+            for _ in range(10):
+                paragraph = writer.add_paragraph()
+        elif token.type in ("fence", "code_block"):
+            paragraph = writer.add_paragraph()
+            writer.add_code(paragraph, token.content.rstrip("\n"))
+        elif token.type == "html_block":
+            paragraph = writer.add_paragraph()
+            writer.add_run(paragraph, token.content.rstrip("\n"))
+        elif token.type == "inline":
+            _render_inline(writer, paragraph, token.children or [])
+
+    return paragraph
+
+
+def _render_inline(writer, paragraph, children: list[Token]):
+    """
+    Add the runs of an inline token's children to a paragraph.
+    """
+    bold = italic = 0
+    link = None  # (url, text) of the link being collected
+
+    for child in children:
+        if child.type == "strong_open":
+            bold += 1
+        elif child.type == "strong_close":
+            bold -= 1
+        elif child.type == "em_open":
+            italic += 1
+        elif child.type == "em_close":
+            italic -= 1
+        elif child.type == "link_open":
+            link = (child.attrs["href"], [])
+        elif child.type == "link_close":
+            writer.add_hyperlink(paragraph, "".join(link[1]), link[0])
+            link = None
+        elif link is not None:
+            # Hyperlinks are a single run of plain text
+            link[1].append(child.content)
+        elif child.type in ("text", "html_inline"):
+            if child.content:
+                if bold or italic:
+                    writer.add_run(
+                        paragraph, child.content, bold=bool(bold), italic=bool(italic)
+                    )
                 else:
-                    paragraph = add_paragraph(style=document.styles[wstyle])
-                    styled_run = paragraph.add_run(match.group(1))
+                    writer.add_run(paragraph, child.content)
+        elif child.type == "code_inline":
+            writer.add_code(paragraph, child.content)
+        elif child.type in ("softbreak", "hardbreak"):
+            writer.add_run(paragraph, "\n")
+        elif child.type == "image":
+            writer.add_picture(paragraph, child.attrs["src"], child.content)
 
-                last_idx = match.end()
-                last_style = style
-        else:
-            remaining: str = text[last_idx:]
 
-            # paragraph = add_paragraph()
-            paragraph.add_run(remaining)
+## Element names and attribute values written by OxmlWriter
+W_PPR, W_PSTYLE, W_R, W_RPR = qn("w:pPr"), qn("w:pStyle"), qn("w:r"), qn("w:rPr")
+W_B, W_I, W_RFONTS, W_SZ = qn("w:b"), qn("w:i"), qn("w:rFonts"), qn("w:sz")
+W_T, W_TAB, W_BR, W_DRAWING = qn("w:t"), qn("w:tab"), qn("w:br"), qn("w:drawing")
+W_HYPERLINK, W_VAL, XML_SPACE = qn("w:hyperlink"), qn("w:val"), qn("xml:space")
+R_ID = qn("r:id")
 
-            return paragraph
 
-    for line in text.split("\n"):
-        matches = [
-            (match, style, pattern_info.get("style", style))
-            for style, pattern_info in MARKDOWN_STYLES.items()
-            for match in pattern_info["regex"].finditer(line)
-        ]
-        sorted_matches = sorted(matches, key=lambda x: x[0].start())
-        if len(sorted_matches) == 1:
-            paragraph = print_matches(line, sorted_matches)
-        elif len(sorted_matches) == 0:
-            paragraph = add_paragraph()
-            print_matches(line, sorted_matches)
+def _code_fonts() -> dict[str, str]:
+    # The rFonts attributes python-docx sets for a font name, which depend on its version
+    r = OxmlElement("w:r")
+    Font(r).name = "Arial"
+    return dict(r.rPr.rFonts.attrib)
+
+
+# Font and size of code runs, sizes are in half points
+CODE_FONTS = _code_fonts()
+CODE_SIZE = str(Pt(10).pt * 2).removesuffix(".0")
+# Text is split into w:t elements at tabs and line breaks
+RUN_CONTENT = re.compile(r"([\t\r\n])")
+
+
+def _bool(element, value: bool):
+    """
+    Set an on/off property like w:b, which is on when it has no value.
+    """
+    if not value:
+        element.set(W_VAL, "0")
+
+
+def _append_text(r, text: str):
+    """
+    Append text to a run like CT_R.texts, tabs become w:tab and line breaks w:br.
+    """
+    for content in RUN_CONTENT.split(text) if text else ():
+        if content == "\t":
+            SubElement(r, W_TAB)
+        elif content in ("\r", "\n"):
+            SubElement(r, W_BR)
+        elif content:
+            t = SubElement(r, W_T)
+            t.text = content
+            if len(content.strip()) < len(content):
+                t.set(XML_SPACE, "preserve")
+
+
+## Output backends:
+## Engines describe what to write (paragraphs, runs, links and pictures) to a writer.
+## DocxWriter goes through python-docx's Paragraph and Run objects, OxmlWriter builds the same
+## w:p/w:r elements directly and adds all new paragraphs to the parent at once.
+## Paragraphs are passed around as whatever the writer returned from add_paragraph.
+
+
+class DocxWriter:
+    """
+    Writes rendered markdown through python-docx's Paragraph and Run objects.
+    """
+
+    def __init__(self, document, parent=None):
+        self.parent = document if parent is None else parent
+        self.styles = document_styles(document)
+
+    def add_paragraph(self, style: str | None = None) -> Paragraph:
+        return self.styles.add_paragraph(self.parent, style)
+
+    def last_paragraph(self) -> Paragraph:
+        return _last_paragraph(self.parent)
+
+    def add_run(self, paragraph: Paragraph, text: str, bold=None, italic=None):
+        run = paragraph.add_run(text)
+        if bold is not None:
+            run.bold = bold
+        if italic is not None:
+            run.italic = italic
+
+    def add_code(self, paragraph: Paragraph, text: str):
+        run = paragraph.add_run(text)
+        run.font.name = "Arial"
+        run.font.size = Pt(10)
+
+    def add_hyperlink(self, paragraph: Paragraph, text: str, url: str):
+        add_hyperlink(paragraph, text, url)
+
+    def add_picture(self, paragraph: Paragraph, path: str, alt: str):
+        try:
+            add_picture(paragraph.add_run(), path)
+        except Exception:
+            paragraph.add_run(alt)
+
+    def flush(self):
+        pass
+
+    def paragraph(self, paragraph: Paragraph | None) -> Paragraph | None:
+        return paragraph
+
+
+class OxmlWriter:
+    """
+    Writes rendered markdown as w:p/w:r elements, producing the same XML as DocxWriter.
+
+    Elements are appended in document order, skipping python-docx's schema ordered inserts,
+    and new paragraphs are added to the parent in one operation by flush.
+    """
+
+    def __init__(self, document, parent=None):
+        parent = document if parent is None else parent
+        self.container = getattr(
+            parent, "_body", parent
+        )  # Documents delegate to their body
+        self.part = self.container.part
+        self.styles = document_styles(document)
+        # New paragraphs not yet added to the parent
+        self._paragraphs: list[CT_P] = []
+
+    def add_paragraph(self, style: str | None = None) -> CT_P:
+        p = OxmlElement("w:p")
+        if style is not None:
+            # Like CT_P.style a pPr is added even for the default style
+            pPr = SubElement(p, W_PPR)
+            if (style_id := self.styles.style_id(style)) is not None:
+                SubElement(pPr, W_PSTYLE).set(W_VAL, style_id)
+        self._paragraphs.append(p)
+        return p
+
+    def last_paragraph(self) -> CT_P:
+        if self._paragraphs:
+            return self._paragraphs[-1]
+        return next(self.container._element.iterchildren(qn("w:p"), reversed=True))
+
+    def add_run(self, p: CT_P, text: str, bold=None, italic=None):
+        r = SubElement(p, W_R)
+        if bold is not None or italic is not None:
+            rPr = SubElement(r, W_RPR)
+            if bold is not None:
+                _bool(SubElement(rPr, W_B), bold)
+            if italic is not None:
+                _bool(SubElement(rPr, W_I), italic)
+        _append_text(r, text)
+
+    def add_code(self, p: CT_P, text: str):
+        r = SubElement(p, W_R)
+        rPr = SubElement(r, W_RPR)
+        SubElement(rPr, W_RFONTS, CODE_FONTS)
+        SubElement(rPr, W_SZ).set(W_VAL, CODE_SIZE)
+        _append_text(r, text)
+
+    def add_hyperlink(self, p: CT_P, text: str, url: str):
+        p.append(_hyperlink(self.part, text, url))
+
+    def add_picture(self, p: CT_P, path: str, alt: str):
+        r = SubElement(p, W_R)
+        try:
+            inline = part_images(self.part).inline(path)
+        except Exception:
+            self.add_run(p, alt)
         else:
-            # We in trouble
-            raise NotImplementedError(
-                "Multiple styles in a single line not yet implemented.", sorted_matches
-            )
+            SubElement(r, W_DRAWING).append(inline)
+
+    def flush(self):
+        """
+        Add the new paragraphs to the parent.
+        """
+        if not self._paragraphs:
+            return
+        element = self.container._element
+        index = len(element)
+        # Like python-docx the body's paragraphs go before its final section properties
+        if index and element[-1].tag == qn("w:sectPr"):
+            index -= 1
+        element[index:index] = self._paragraphs
+        self._paragraphs = []
+
+    def paragraph(self, p: CT_P | None) -> Paragraph | None:
+        return None if p is None else Paragraph(p, self.container)
+
+
+class FragmentWriter(OxmlWriter):
+    """
+    An OxmlWriter that can store what it wrote as a Fragment, or write a stored one.
+
+    Links and images are recorded as they are written, so their relationships can be
+    created on the part a stored fragment is written to.
+    """
+
+    def __init__(self, document, parent=None):
+        super().__init__(document, parent)
+        self.links: list[str] = []
+        self.images: list[str] = []
+        # Text continuing the parent's last paragraph changes more than new paragraphs
+        self.cacheable = True
+
+    def last_paragraph(self) -> CT_P:
+        if not self._paragraphs:
+            self.cacheable = False
+        return super().last_paragraph()
+
+    def add_hyperlink(self, p: CT_P, text: str, url: str):
+        self.links.append(url)
+        super().add_hyperlink(p, text, url)
+
+    def add_picture(self, p: CT_P, path: str, alt: str):
+        self.images.append(path)
+        super().add_picture(p, path, alt)
+
+    def fragment(self) -> Fragment | None:
+        """
+        The new paragraphs as a Fragment, None if they can't be reused.
+        """
+        if not self.cacheable:
+            return None
+        return Fragment(
+            b"".join(etree.tostring(p) for p in self._paragraphs),
+            self.links,
+            [(path, image_stamp(path)) for path in self.images],
+        )
+
+    def load(self, fragment: Fragment) -> CT_P | None | bool:
+        """
+        Add a stored fragment's paragraphs, relating its links and images to the part.
+
+        :return: The last paragraph, False if the fragment's images can't be written.
+        """
+        paragraphs = list(parse_xml(b"<fragment>%s</fragment>" % fragment.xml))
+        hyperlinks = [e for p in paragraphs for e in p.iter(W_HYPERLINK)]
+        drawings = [e for p in paragraphs for e in p.iter(W_DRAWING)]
+        pictures = fragment.pictures
+        if len(hyperlinks) != len(fragment.links) or len(drawings) != len(pictures):
+            return False
+        try:
+            inlines = [part_images(self.part).inline(path) for path in pictures]
+        except Exception:
+            return False
+
+        for hyperlink, url in zip(hyperlinks, fragment.links):
+            hyperlink.set(R_ID, _hyperlink_r_id(self.part, url))
+        for drawing, inline in zip(drawings, inlines):
+            drawing[:] = [inline]
+        self._paragraphs = paragraphs
+        return paragraphs[-1] if paragraphs else None
+
+
+## Engines and backends selectable in markdown_to_word
+## (MARKDOWN_ENGINE and MARKDOWN_BACKEND environment variables)
+MARKDOWN_ENGINES = {"regex": apply_markdown_style, "markdown-it": render_tokens}
+MARKDOWN_ENGINE = env.get("MARKDOWN_ENGINE", "regex")
+MARKDOWN_BACKENDS = {"docx": DocxWriter, "oxml": OxmlWriter}
+MARKDOWN_BACKEND = env.get("MARKDOWN_BACKEND", "docx")
+# Worker processes render_fragments renders in by default
+MARKDOWN_WORKERS = int(env.get("MARKDOWN_WORKERS", 0))
+# Part of stored fragments' keys, change an engine's version when the XML it writes changes
+ENGINE_VERSIONS = {
+    "regex": "2",
+    "markdown-it": f"1, markdown-it-py {markdown_it.__version__}",
+}
+# Styles an engine needs on top of REQUIRED_STYLES
+ENGINE_STYLES = {"regex": (), "markdown-it": (NUMBERED_LIST_STYLE,)}
+
+
+def engine_styles(engine=None) -> tuple[str, ...]:
+    """
+    Every style the given engine (default MARKDOWN_ENGINE) renders markdown with.
+    """
+    return (*REQUIRED_STYLES, *ENGINE_STYLES[engine or MARKDOWN_ENGINE])
 
 
-def markdown_to_word(doc_content, document, parent=None):
+def markdown_to_word(
+    doc_content, document, parent=None, engine=None, backend=None, fragments=None
+):
     """
     Parse the given Markdown content and apply styles to a Word document or a specified parent container.
 
@@ -172,54 +772,126 @@ def markdown_to_word(doc_content, document, parent=None):
     :param document: docx Document object.
     :param parent: Optional. Parent container such as a table cell in the document.
                    If none is provided, new paragraphs are added to the document.
+    :param engine: Optional. 'regex' or 'markdown-it', defaults to MARKDOWN_ENGINE.
+    :param backend: Optional. 'docx' or 'oxml', defaults to MARKDOWN_BACKEND.
+    :param fragments: Optional. Fragments from render_fragments, added instead of rendering.
+    :return: The last paragraph written.
     """
-    # Split content into Markdown blocks.
-    # blocks = doc_content.split("\n")
-
-    # Function to add a paragraph either to the document root or within a specified parent.
-    def add_paragraph(style=None):
-        if parent is None:
-            return document.add_paragraph(style=style)
-        else:
-            return parent.add_paragraph(style=style)
-
-        # for block in blocks:
-        #     # Check for Markdown headers and apply accordingly.
-        #     for header_pattern in ("h1", "h2", "h3", "h4", "h5"):
-        #         header = MARKDOWN_STYLES[header_pattern]
-        #         match = header["regex"].match(block.lstrip())
-        #         if match:
-        #             paragraph = add_paragraph(style=document.styles[header["style"]])
-        #             paragraph.add_run(match.group(1))
-        #             paragraph = add_paragraph()
-        #             break
-        #     else:  # If not a header, apply Markdown styles to a new or existing parent.
-
-    apply_markdown_style(document, doc_content, parent=parent)
-    # paragraph = add_paragraph()
+    engine = engine or MARKDOWN_ENGINE
+    if engine not in MARKDOWN_ENGINES:
+        raise ValueError(
+            f"Unknown markdown engine {engine!r}, expected one of {list(MARKDOWN_ENGINES)}"
+        )
+    backend = backend or MARKDOWN_BACKEND
+    if backend not in MARKDOWN_BACKENDS:
+        raise ValueError(
+            f"Unknown markdown backend {backend!r}, expected one of {list(MARKDOWN_BACKENDS)}"
+        )
+    if fragments or FRAGMENT_STORE is not None:
+        return _fragment_to_word(doc_content, document, parent, engine, fragments)
+
+    writer = MARKDOWN_BACKENDS[backend](document, parent)
+    paragraph = MARKDOWN_ENGINES[engine](document, doc_content, parent, writer)
+    writer.flush()
+    return writer.paragraph(paragraph)
+
+
+def _fragment_key(document, text: str, engine: str) -> str:
+    return fragment_key(
+        ENGINE_VERSIONS[engine], engine, document_styles(document).fingerprint, text
+    )
 
 
-def add_hyperlink(paragraph, text, url):
+def _fragment_to_word(doc_content, document, parent, engine, fragments):
     """
-    A function that places a hyperlink within a paragraph object.
+    markdown_to_word adding pre-rendered fragments or those in the FRAGMENT_STORE, only
+    rendering text not rendered before with the same engine and template styles.
 
-    :param paragraph: The Paragraph object where the hyperlink will be added.
-    :param text: The text displayed for the hyperlink.
-    :param url: The destination URL for the hyperlink.
-    :return: The hyperlink object.
+    Fragments are always written by the oxml backend, which writes the same XML as docx.
     """
-    part = paragraph.part
-    r_id = part.relate_to(
-        url,
-        "http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink",
-        is_external=True,
-    )
+    key = _fragment_key(document, doc_content, engine)
+    writer = FragmentWriter(document, parent)
+    fragment = fragments.get(key) if fragments else None
+    if fragment is None and FRAGMENT_STORE is not None:
+        fragment = FRAGMENT_STORE.get(key)
+    if fragment is not None:
+        if (paragraph := writer.load(fragment)) is not False:
+            writer.flush()
+            return writer.paragraph(paragraph)
+
+    paragraph = MARKDOWN_ENGINES[engine](document, doc_content, parent, writer)
+    if FRAGMENT_STORE is not None and (fragment := writer.fragment()) is not None:
+        FRAGMENT_STORE.put(key, fragment)
+    writer.flush()
+    return writer.paragraph(paragraph)
+
+
+## Process pool rendering: every worker opens the template once and renders texts to
+## fragments, which markdown_to_word adds to the document in the calling process.
+_worker_document = None
+
+
+def _open_template(template: str):
+    global _worker_document
+    _worker_document = Document(template)
+
+
+def _render_fragment(text: str, engine: str) -> tuple[str, Fragment | None]:
+    key = _fragment_key(_worker_document, text, engine)
+    if FRAGMENT_STORE is not None and (fragment := FRAGMENT_STORE.get(key)) is not None:
+        return key, fragment
+    # The paragraphs are never added to the worker's document
+    writer = FragmentWriter(_worker_document)
+    MARKDOWN_ENGINES[engine](_worker_document, text, None, writer)
+    fragment = writer.fragment()
+    if FRAGMENT_STORE is not None and fragment is not None:
+        FRAGMENT_STORE.put(key, fragment)
+    return key, fragment
+
+
+def render_fragments(
+    texts, template, engine=None, max_workers: int = MARKDOWN_WORKERS
+) -> dict[str, Fragment]:
+    """
+    Render markdown texts in a process pool, to be passed to markdown_to_word as fragments.
+
+    Texts continuing the paragraph before them can't be rendered on their own, they are
+    left out and rendered by markdown_to_word.
 
+    :param texts: Markdown texts, duplicates are only rendered once.
+    :param template: Path of the template the document was created from.
+    :param engine: Optional. 'regex' or 'markdown-it', defaults to MARKDOWN_ENGINE.
+    :param max_workers: Number of worker processes.
+    :return: Fragments by key.
+    """
+    engine = engine or MARKDOWN_ENGINE
+    if engine not in MARKDOWN_ENGINES:
+        raise ValueError(
+            f"Unknown markdown engine {engine!r}, expected one of {list(MARKDOWN_ENGINES)}"
+        )
+    texts = list(dict.fromkeys(texts))
+    if not texts:
+        return {}
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(max_workers, len(texts))),
+        initializer=_open_template,
+        initargs=(str(template),),
+    ) as pool:
+        results = pool.map(
+            partial(_render_fragment, engine=engine),
+            texts,
+            chunksize=max(1, len(texts) // (4 * max(1, max_workers))),
+        )
+        return {key: fragment for key, fragment in results if fragment is not None}
+
+
+HYPERLINK = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink"
+)
+
+
+def _hyperlink_template():
     hyperlink = OxmlElement("w:hyperlink")
-    hyperlink.set(
-        qn("r:id"),
-        r_id,
-    )
 
     new_run = OxmlElement("w:r")
     rPr = OxmlElement("w:rPr")
@@ -233,12 +905,55 @@ def add_hyperlink(paragraph, text, url):
     rPr.append(u)
 
     new_run.append(rPr)
-
-    text_node = OxmlElement("w:t")
-    text_node.text = text
-    new_run.append(text_node)
+    new_run.append(OxmlElement("w:t"))
 
     hyperlink.append(new_run)
+    return hyperlink
+
+
+# Every hyperlink is a copy of this
+HYPERLINK_TEMPLATE = _hyperlink_template()
+
+# Relationship id of each link target, by the root element of the part (parts compare
+# by name so can't be keys)
+_HYPERLINK_R_IDS: "weakref.WeakKeyDictionary[object, dict[str, str]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _hyperlink_r_id(part, url: str) -> str:
+    """
+    Relationship id of a link target.
+
+    relate_to reuses existing relationships but searches all of the part's relationships
+    to find them, so ids are remembered per part.
+    """
+    r_ids = _HYPERLINK_R_IDS.setdefault(part.element, {})
+    if (r_id := r_ids.get(url)) is None:
+        r_id = r_ids[url] = part.relate_to(url, HYPERLINK, is_external=True)
+    return r_id
+
+
+def _hyperlink(part, text: str, url: str):
+    """
+    A new w:hyperlink element of a part.
+    """
+    hyperlink = deepcopy(HYPERLINK_TEMPLATE)
+    hyperlink.set(qn("r:id"), _hyperlink_r_id(part, url))
+    hyperlink[0][-1].text = text  # w:r/w:t
+    return hyperlink
+
+
+def add_hyperlink(paragraph, text, url):
+    """
+    A function that places a hyperlink within a paragraph object.
+
+    :param paragraph: The Paragraph object where the hyperlink will be added.
+    :param text: The text displayed for the hyperlink.
+    :param url: The destination URL for the hyperlink.
+    :return: The hyperlink object.
+    """
+    hyperlink = _hyperlink(paragraph.part, text, url)
     paragraph._p.append(hyperlink)
 
     return hyperlink
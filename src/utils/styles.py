@@ -0,0 +1,123 @@
+"""Style lookups for generated Word documents"""
+
+import hashlib
+import weakref
+from functools import cached_property
+
+from docx.document import Document as _Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.styles.style import BaseStyle
+from docx.text.paragraph import Paragraph
+
+# Styles markdown content is rendered with, see "Adding new (or updating) new templates" in the Readme
+REQUIRED_STYLES = (
+    "Heading 1",
+    "Heading 2",
+    "Heading 3",
+    "Heading 4",
+    "Heading 5",
+    "Heading 6",
+    "List Bullet",
+    "List Bullet 2",
+    "List Bullet 3",
+)
+
+# By the root element of the document's part, which lives as long as the document.
+# Documents can't hold attributes of their own with every python-docx version, and parts
+# compare by name so can't be keys.
+_RESOLVERS: "weakref.WeakKeyDictionary[object, StyleResolver]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class MissingStyleError(KeyError):
+    """
+    The template does not define styles the generator needs.
+    """
+
+    def __init__(self, missing: list[str]):
+        super().__init__(missing)
+        self.missing = missing
+
+    def __str__(self):
+        return (
+            f"Template is missing the style(s) {', '.join(map(repr, self.missing))},"
+            " see 'Adding new (or updating) new templates' in the Readme"
+        )
+
+
+class StyleResolver:
+    """
+    A document's styles by name, resolved once.
+
+    python-docx walks the whole styles part on every lookup by name (and again to compare
+    with the default style when one is applied), this looks styles and their ids up in a dict.
+    Styles added to the document after the resolver was created are not seen.
+    """
+
+    def __init__(self, document: _Document):
+        self.styles: dict[str, BaseStyle] = {
+            style.name: style for style in document.styles
+        }
+        default = document.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+        self._default_id = default.style_id if default is not None else None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.styles
+
+    def __getitem__(self, name: str) -> BaseStyle:
+        try:
+            return self.styles[name]
+        except KeyError:
+            raise MissingStyleError([name]) from None
+
+    def require(self, names=REQUIRED_STYLES) -> "StyleResolver":
+        """
+        Fail before rendering if any of the given styles are not defined.
+
+        :raises MissingStyleError: listing every missing style.
+        """
+        if missing := [name for name in names if name not in self.styles]:
+            raise MissingStyleError(missing)
+        return self
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """
+        Hash of the style names and ids, which is all rendered markdown depends on.
+        """
+        ids = sorted((name, style.style_id) for name, style in self.styles.items())
+        return hashlib.sha256(repr((ids, self._default_id)).encode()).hexdigest()
+
+    def style_id(self, name: str) -> str | None:
+        """
+        The id a paragraph's style is set to, None for the default paragraph style.
+        """
+        style_id = self[name].style_id
+        # Like python-docx the default paragraph style is applied by not setting one
+        return None if style_id == self._default_id else style_id
+
+    def apply(self, paragraph: Paragraph, name: str):
+        """
+        Set a paragraph's style by name.
+        """
+        paragraph._p.style = self.style_id(name)
+
+    def add_paragraph(self, parent, name: str | None = None) -> Paragraph:
+        """
+        Add a paragraph with the given style to a document, table cell etc.
+        """
+        paragraph = parent.add_paragraph()
+        if name is not None:
+            self.apply(paragraph, name)
+        return paragraph
+
+
+def document_styles(document: _Document) -> StyleResolver:
+    """
+    The style resolver of a document, created on first use.
+    """
+    resolver = _RESOLVERS.get(document.part.element)
+    if resolver is None:
+        resolver = _RESOLVERS[document.part.element] = StyleResolver(document)
+    return resolver
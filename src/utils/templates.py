@@ -0,0 +1,87 @@
+"""Word templates loaded once per process, every document is a fresh copy"""
+
+from copy import deepcopy
+from pathlib import Path
+from threading import Lock
+
+from docx.document import Document as _Document
+from docx.opc.constants import CONTENT_TYPE as CT
+from docx.opc.package import Unmarshaller
+from docx.opc.part import PartFactory, XmlPart
+from docx.opc.pkgreader import PackageReader
+from docx.package import Package
+
+
+class Template:
+    """
+    A template's parts as read from disk once, with the XML parts already parsed.
+
+    Documents are created by python-docx's Unmarshaller as when opening the file, except
+    that XML parts are copies of the parsed parts instead of being parsed again.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        # The zip's parts and relationships, iterated again for every document
+        self._reader = PackageReader.from_file(str(path))
+        # Parsed XML of each part, documents get copies of these
+        self._parts: dict[str, XmlPart] = {}
+        package = Package()
+        Unmarshaller.unmarshal(self._reader, package, PartFactory)
+        self._parts = {
+            part.partname: part
+            for part in package.iter_parts()
+            if isinstance(part, XmlPart)
+        }
+        if package.main_document_part.content_type != CT.WML_DOCUMENT_MAIN:
+            raise ValueError(
+                f"file '{path}' is not a Word file, content type is"
+                f" '{package.main_document_part.content_type}'"
+            )
+
+    def _part(self, partname, content_type, reltype, blob, package):
+        if (part := self._parts.get(partname)) is None:
+            return PartFactory(partname, content_type, reltype, blob, package)
+        return type(part)(partname, content_type, deepcopy(part.element), package)
+
+    def document(self) -> _Document:
+        """
+        A new document, independent of the template and every other document.
+        """
+        package = Package()
+        Unmarshaller.unmarshal(self._reader, package, self._part)
+        return package.main_document_part.document
+
+
+class TemplatePool:
+    """
+    Templates by path, loaded again when the file changes.
+    """
+
+    def __init__(self):
+        self._templates: dict[Path, tuple[tuple[int, int], Template]] = {}
+        self._lock = Lock()
+
+    def get(self, path: Path | str) -> Template:
+        path = Path(path).resolve()
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._templates.get(path)
+            if cached is None or cached[0] != stamp:
+                cached = self._templates[path] = (stamp, Template(path))
+            return cached[1]
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+TEMPLATE_POOL = TemplatePool()
+
+
+def open_template(path: Path | str) -> _Document:
+    """
+    A new document from a template, like Document(path) without reading the file again.
+    """
+    return TEMPLATE_POOL.get(path).document()
@@ -2,26 +2,75 @@
 
 from __future__ import annotations
 from rich import print
+from rich.progress import track
 
+import hashlib
+import json
 import logging
+import os
 import re
+import threading
+import time
 
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from enum import Enum
-from typing import Iterable
+from functools import cached_property
+from os import environ as env
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
 
+import frontmatter
 import requests
 import typer
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+if TYPE_CHECKING:
+    from src.utils.uoc_store import UnitStore
 
 logger = logging.getLogger(__name__)
 app = typer.Typer()
 
 
+# On-disk cache of fetched pages, configurable from the environment
+CACHE_DIR = Path(
+    env.get("UOC_CACHE_DIR", Path.home() / ".cache" / "kad_generator" / "uoc")
+).expanduser()
+CACHE_TTL = float(env.get("UOC_CACHE_TTL", 7 * 24 * 60 * 60))  # seconds
+OFFLINE = env.get("UOC_OFFLINE", "").lower() in ("1", "true", "yes")
+# Number of units fetched at once by prefetch()
+MAX_WORKERS = int(env.get("UOC_MAX_WORKERS", 8))
+
+# HTTP session settings, configurable from the environment
+CONNECT_TIMEOUT = float(env.get("UOC_CONNECT_TIMEOUT", 5))  # seconds
+READ_TIMEOUT = float(env.get("UOC_READ_TIMEOUT", 30))  # seconds
+RETRIES = int(env.get("UOC_RETRIES", 3))
+BACKOFF = float(env.get("UOC_BACKOFF", 0.5))  # seconds, doubled on every retry
+MAX_PER_HOST = int(env.get("UOC_MAX_PER_HOST", 4))  # concurrent connections per host
+
+# Lean parsing only builds a tree of the page's main content region. It uses the same
+# parser as a full parse, lxml repairs malformed markup differently.
+LEAN_PARSE = env.get("UOC_LEAN_PARSE", "").lower() in ("1", "true", "yes")
+CONTENT_STRAINER = SoupStrainer("main")
+
+# Sections read by the parse_* methods, and the name their lists are cached under
+LIST_SECTIONS = {
+    "Knowledge Evidence": "knowledge_criteria",
+    "Performance Evidence": "performance_criteria",
+    "Assessment Conditions": "assessment_conditions",
+}
+
 # If there is an error in the underlying html formatting then we have to explicitly add the element so it renders properly
+# (bump PARSER_VERSION when changing these)
 EXCEPTIONS = {"processes for operating and running variables through algorithms"}
 
+# Sections and lists parsed by another version are parsed again from the cached page,
+# bump when a change alters what is parsed from a page
+PARSER_VERSION = "1"
+
 
 class UOCSections(Enum):
     """
@@ -70,6 +119,176 @@ class UnitOfCompetencyNotFoundError(UnitOfCompetencyError):
         super().__init__(self.message)
 
 
+@dataclass
+class CacheEntry:
+    """
+    Index record pointing a unit code at the cached page it was last served.
+    """
+
+    unit_code: str
+    url: str
+    digest: str
+    fetched_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """
+        Conditional request headers used to revalidate the cached page.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class UnitOfCompetencyCache:
+    """
+    Content-addressed on-disk cache of training.gov.au pages.
+
+    Raw html is stored under its sha256 digest in ``objects/`` alongside the
+    ``UnitOfCompetencyData`` parsed from it, ``units/<unit code>.json`` records which
+    digest is current for a unit and the ETag/Last-Modified needed to revalidate it
+    once ``ttl`` seconds have passed. In ``offline`` mode cached pages are always
+    served and the network is never touched.
+    """
+
+    def __init__(
+        self,
+        directory: Path = CACHE_DIR,
+        ttl: float = CACHE_TTL,
+        offline: bool = OFFLINE,
+    ):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.offline = offline
+        # Units with identical pages share the stored sections, storing one reads the
+        # others and writes them back
+        self._sections_lock = threading.Lock()
+
+    def _object_path(self, digest: str, suffix: str) -> Path:
+        return self.directory / "objects" / digest[:2] / f"{digest}{suffix}"
+
+    def _entry_path(self, unit_code: str) -> Path:
+        return self.directory / "units" / f"{unit_code}.json"
+
+    @staticmethod
+    def _write(path: Path, text: str):
+        # Write then rename so concurrent readers never see a partial file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+
+    def entry(self, unit_code: str) -> CacheEntry | None:
+        """
+        Return the cache entry for a unit, or None if it has never been cached.
+        """
+        path = self._entry_path(unit_code)
+        try:
+            entry = CacheEntry(**json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+        if not self._object_path(entry.digest, ".html").is_file():
+            return None
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.fetched_at < self.ttl
+
+    def html(self, entry: CacheEntry) -> str:
+        return self._object_path(entry.digest, ".html").read_text(encoding="utf-8")
+
+    def _parsed(self, entry: CacheEntry) -> dict:
+        try:
+            stored = json.loads(
+                self._object_path(entry.digest, ".json").read_text(encoding="utf-8")
+            )
+        except (OSError, ValueError):
+            return {"parser": PARSER_VERSION}
+        if not isinstance(stored, dict) or stored.get("parser") != PARSER_VERSION:
+            return {"parser": PARSER_VERSION}
+        return stored
+
+    def data(self, entry: CacheEntry, lean: bool = False) -> dict:
+        """
+        Return the parsed sections and lists stored for the cached page, by name.
+
+        Only those parsed by this PARSER_VERSION in the same (lean or full) mode.
+        """
+        return self._parsed(entry).get("lean" if lean else "full", {})
+
+    def store(
+        self,
+        unit_code: str,
+        url: str,
+        html: str,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> CacheEntry:
+        """
+        Store a freshly fetched page and point the unit's entry at it.
+        """
+        digest = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        html_path = self._object_path(digest, ".html")
+        if not html_path.is_file():
+            self._write(html_path, html)
+        entry = CacheEntry(unit_code, url, digest, time.time(), etag, last_modified)
+        self._write(self._entry_path(unit_code), json.dumps(asdict(entry)))
+        return entry
+
+    def store_section(self, entry: CacheEntry, name: str, value, lean: bool = False):
+        """
+        Store a section (or a parse_* list) parsed from a cached page, next to any
+        stored before by the same parser.
+        """
+        with self._sections_lock:
+            stored = self._parsed(entry)
+            stored.setdefault("lean" if lean else "full", {})[name] = value
+            self._write(self._object_path(entry.digest, ".json"), json.dumps(stored))
+
+    def touch(self, entry: CacheEntry) -> CacheEntry:
+        """
+        Mark an entry as revalidated (the server answered 304 Not Modified).
+        """
+        entry.fetched_at = time.time()
+        self._write(self._entry_path(entry.unit_code), json.dumps(asdict(entry)))
+        return entry
+
+
+def build_session(
+    retries: int = RETRIES,
+    backoff_factor: float = BACKOFF,
+    max_per_host: int = MAX_PER_HOST,
+) -> requests.Session:
+    """
+    Build a keep-alive session that retries 429/5xx responses with exponential backoff.
+
+    Connections are pooled per host and the pool blocks once ``max_per_host``
+    connections are in use, capping how hard any one host is hit.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_maxsize=max_per_host, pool_block=True, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared by every UnitOfCompetency unless one is passed explicitly
+CACHE = UnitOfCompetencyCache()
+SESSION = build_session()
+
+
 class UnitOfCompetency:
     """
     Class representing a Unit of Competency from training.gov.au.
@@ -78,7 +297,14 @@ class UnitOfCompetency:
 
     base_url = "https://training.gov.au/training/details/"
 
-    def __init__(self, unit_code: str, sections: Iterable[UOCSections] = UOCSections):
+    def __init__(
+        self,
+        unit_code: str,
+        sections: Iterable[UOCSections] = UOCSections,
+        cache: UnitOfCompetencyCache | None = None,
+        lean: bool = LEAN_PARSE,
+        html: str | None = None,
+    ):
         # exrtract aqf level from unit code (also validates unit code)
         match = re.search(r"\d", unit_code)
         if not match:
@@ -87,65 +313,167 @@ class UnitOfCompetency:
         self.unit_code = unit_code
         self.sections = sections
         self.url = self.base_url + unit_code
-        self._soup = BeautifulSoup(self._fetch_page(), "html.parser")
-        self.data = self._get_data(self.sections)
+        self.cache = cache if cache is not None else CACHE
+        self.lean = lean
+        self._entry: CacheEntry | None = None
+        # Where the unit was loaded from: "html", "cache", "revalidated", "network"
+        # or "store"
+        self.source: str | None = "html" if html is not None else None
+        # A page passed in directly is parsed as is, bypassing the network and cache
+        self._html = html
+        # Nothing is fetched or parsed until a section is first accessed
+        self._lists: dict[str, dict[str, list[str]]] = {}
+
+    @classmethod
+    def from_store(
+        cls, store: UnitStore, unit_code: str, release: str | None = None
+    ) -> UnitOfCompetency:
+        """
+        Load a unit previously imported into a UnitStore, without network or parsing.
 
-    def parse_assessment_conditions(self):
-        # Find the section of interest, the 'assessment_conditions' header
-        assessment_conditions_section = self._soup.find(
-            "h2", string="Assessment Conditions"
-        )
-        if not assessment_conditions_section:
-            return {}  # Return an empty dictionary if the desired section is not found
-
-        _dict = (
-            {}
-        )  # Dictionary to store the final assessment_conditions elements and their sub-points
-        current_key = (
-            None  # To keep track of the current main assessment_conditions element
-        )
+        :param store: The store to load from.
+        :param unit_code: training.gov.au unit of competency code.
+        :param release: Release to load, defaults to the latest imported release.
+        """
+        if not (stored := store.get(unit_code, release)):
+            raise UnitOfCompetencyError(f"{unit_code} is not in the unit store")
+        uoc = cls(unit_code)
+        uoc.source = "store"
+        uoc.release = stored.release
+        for section in UOCSections:
+            setattr(
+                uoc,
+                section.attribute_name,
+                getattr(stored.data, section.attribute_name),
+            )
+        uoc.data = stored.data
+        uoc._lists = {
+            "Knowledge Evidence": stored.knowledge_criteria,
+            "Performance Evidence": stored.performance_criteria,
+            "Assessment Conditions": stored.assessment_conditions,
+        }
+        return uoc
+
+    @cached_property
+    def content_hash(self) -> str:
+        """
+        Stable sha256 of the unit's parsed content, whitespace normalized.
+
+        Only changes when the official content of the unit changes, not when the
+        surrounding page markup does.
+        """
+        content = {
+            section.attribute_name: getattr(self, section.attribute_name)
+            for section in UOCSections
+        }
+        content["knowledge_criteria"] = self.parse_knowledge_criteria()
+        content["performance_criteria"] = self.parse_performance_evidence()
+        content["assessment_conditions"] = self.parse_assessment_conditions()
+        return hashlib.sha256(
+            json.dumps(_normalize(content)).encode("utf-8")
+        ).hexdigest()
+
+    @cached_property
+    def release(self) -> str:
+        """
+        Release number of the unit as shown on its page, empty if not found.
+        """
+        if match := self._soup.find(string=re.compile(r"Release\s+\d+")):
+            return re.search(r"Release\s+(\d+)", match).group(1)
+        return ""
 
-        # Iterate over the siblings immediately following the 'assessment_conditions' header
-        for sibling in assessment_conditions_section.find_next_siblings():
-            if sibling.name == "h2":
-                break  # Stop the loop if the next header tag is found, marking the end of the current section
+    @cached_property
+    def data(self) -> UnitOfCompetencyData:
+        return self._get_data(self.sections)
 
-            set_this_loop = False
-            if sibling.name == "p" and len(sibling.text) > 0:
-                _dict[sibling.text] = []
-                continue
-            for li in sibling.find_all("li"):
-                text = li.get_text(strip=True)
-                if current_key and current_key.endswith(":") and not text in EXCEPTIONS:
-                    _dict[current_key].append(text)
-                else:
-                    current_key = li.text
-                    _dict[current_key] = []
-                    set_this_loop = True
+    @cached_property
+    def application(self) -> str:
+        return self._get_section(UOCSections.APPLICATION)
 
-            if current_key and current_key.endswith(":") and not set_this_loop:
-                current_key = None
+    @cached_property
+    def performance_evidence(self) -> str:
+        return self._get_section(UOCSections.PERFORMANCE_EVIDENCE)
 
-        return _dict
+    @cached_property
+    def knowledge_evidence(self) -> str:
+        return self._get_section(UOCSections.KNOWLEDGE_EVIDENCE)
+
+    @cached_property
+    def elements_and_criteria(self) -> dict[str, str]:
+        return self._get_section(UOCSections.ELEMENTS_AND_CRITERIA)
+
+    @cached_property
+    def _page(self) -> str:
+        return self._html if self._html is not None else self._fetch_page()
+
+    @cached_property
+    def _cached_sections(self) -> dict:
+        # Sections already parsed from this exact page
+        self._page  # fetching the page sets self._entry
+        return self.cache.data(self._entry, self.lean) if self._entry else {}
+
+    @cached_property
+    def _soup(self) -> BeautifulSoup:
+        return self._parse(self._page)
+
+    @cached_property
+    def _sections(self) -> dict[str, tuple[Tag, list[Tag]]]:
+        return self._index_sections()
+
+    def parse_assessment_conditions(self):
+        # Find the section of interest, the 'assessment_conditions' header
+        return self._parse_list("Assessment Conditions", paragraphs=True)
 
     def parse_performance_evidence(self):
         # Find the section of interest, the 'performance Evidence' header
-        performance_section = self._soup.find("h2", string="Performance Evidence")
-        if not performance_section:
-            return {}  # Return an empty dictionary if the desired section is not found
+        return self._parse_list("Performance Evidence", paragraphs=True)
 
-        _dict = (
-            {}
-        )  # Dictionary to store the final performance elements and their sub-points
-        current_key = None  # To keep track of the current main performance element
+    def parse_knowledge_criteria(self):
+        # Find the section of interest, the 'Knowledge Evidence' header
+        # The first sibling is the introductory paragraph
+        return self._parse_list("Knowledge Evidence", paragraphs=False, skip=1)
 
-        # Iterate over the siblings immediately following the 'performance Evidence' header
-        for sibling in performance_section.find_next_siblings():
-            if sibling.name == "h2":
-                break  # Stop the loop if the next header tag is found, marking the end of the current section
+    def _parse_list(
+        self, title: str, paragraphs: bool, skip: int = 0
+    ) -> dict[str, list[str]]:
+        """
+        Parse (once) the list items of the section with the given h2 title, from the
+        cache if they were parsed from the same page before.
+        """
+        if title not in self._lists:
+            name = LIST_SECTIONS[title]
+            if name in self._cached_sections:
+                self._lists[title] = self._cached_sections[name]
+                return self._lists[title]
+            if section := self._sections.get(title):
+                self._lists[title] = self._parse_list_section(
+                    section[1][skip:], paragraphs
+                )
+            else:
+                # Return an empty dictionary if the desired section is not found
+                self._lists[title] = {}
+            if self._entry:
+                self.cache.store_section(
+                    self._entry, name, self._lists[title], self.lean
+                )
+        return self._lists[title]
 
+    @staticmethod
+    def _parse_list_section(
+        siblings: list[Tag], paragraphs: bool
+    ) -> dict[str, list[str]]:
+        """
+        Parse the list items of a section into main points and their sub-points.
+
+        A list item ending in ':' collects the items of the following list as its
+        sub-points. If ``paragraphs`` is set, non empty paragraphs are main points too.
+        """
+        _dict = {}  # Dictionary to store the final elements and their sub-points
+        current_key = None  # To keep track of the current main element
+
+        for sibling in siblings:
             set_this_loop = False
-            if sibling.name == "p" and len(sibling.text) > 0:
+            if paragraphs and sibling.name == "p" and len(sibling.text) > 0:
                 _dict[sibling.text] = []
                 continue
             for li in sibling.find_all("li"):
@@ -162,87 +490,142 @@ class UnitOfCompetency:
 
         return _dict
 
-    def parse_knowledge_criteria(self):
-        # Find the section of interest, the 'Knowledge Evidence' header
-        knowledge_section = self._soup.find("h2", string="Knowledge Evidence")
-        if not knowledge_section:
-            return {}  # Return an empty dictionary if the desired section is not found
-
-        criteria_dict = (
-            {}
-        )  # Dictionary to store the final knowledge elements and their sub-points
-        current_key = None  # To keep track of the current main knowledge element
+    def _parse(self, html: str) -> BeautifulSoup:
+        """
+        Parse the page, restricted to its main content region in lean mode.
+        """
+        if self.lean:
+            soup = BeautifulSoup(html, "html.parser", parse_only=CONTENT_STRAINER)
+            found = {str(header.string) for header in soup.find_all("h2")}
+            # Sections outside the main region would silently come out empty
+            if missing := self._headings() - found:
+                logger.debug(
+                    f"{', '.join(sorted(missing))} not in the main content of"
+                    f" {self.unit_code}, parsing page"
+                )
+            else:
+                return soup
+        return BeautifulSoup(html, "html.parser")
 
-        # Iterate over the siblings immediately following the 'Knowledge Evidence' header
-        for sibling in knowledge_section.find_next_siblings()[1:]:
-            set_this_loop = False
-            if sibling.name == "h2":
-                break  # Stop the loop if the next header tag is found, marking the end of the current section
-            for li in sibling.find_all("li"):
-                text = li.get_text(strip=True)
-                if current_key and current_key.endswith(":") and not text in EXCEPTIONS:
-                    criteria_dict[current_key].append(text)
-                else:
-                    current_key = li.text
-                    criteria_dict[current_key] = []
-                    set_this_loop = True
+    def _headings(self) -> set[str]:
+        """
+        Titles of the sections read from the page.
+        """
+        return {section.value for section in self.sections} | set(LIST_SECTIONS)
 
-            if current_key and current_key.endswith(":") and not set_this_loop:
-                current_key = None
+    def _index_sections(self) -> dict[str, tuple[Tag, list[Tag]]]:
+        """
+        Index every h2 section of the page in a single traversal.
 
-        return criteria_dict
+        Maps each h2 title to its header and the sibling tags following it up to
+        the next h2, so section parsers don't have to search the page themselves.
+        """
+        index = {}
+        for header in self._soup.find_all("h2"):
+            siblings = []
+            for sibling in header.next_siblings:
+                if not isinstance(sibling, Tag):
+                    continue
+                if sibling.name == "h2":
+                    break
+                siblings.append(sibling)
+            # Like soup.find the first section with a given title wins
+            if header.string is not None:
+                index.setdefault(str(header.string), (header, siblings))
+        return index
 
     def _fetch_page(self) -> str:
         """
         Fetch the web page containing the Unit of Competency details.
+
+        Pages are served from the cache while fresh, revalidated with the stored
+        ETag/Last-Modified once stale and never requested at all in offline mode.
         """
+        entry = self.cache.entry(self.unit_code)
+        if entry and (self.cache.offline or self.cache.is_fresh(entry)):
+            logger.debug(f"Using cached page for {self.unit_code}")
+            self._entry = entry
+            self.source = "cache"
+            return self.cache.html(entry)
+        if self.cache.offline:
+            raise UnitOfCompetencyError(
+                f"{self.unit_code} is not cached and offline mode is enabled"
+            )
+
         logger.debug(f"Fetching page {self.url}")
         try:
-            response = requests.get(self.url)
+            response = SESSION.get(
+                self.url,
+                headers=entry.validators if entry else None,
+                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+            )
+            if entry and response.status_code == 304:
+                logger.debug(f"Cached page for {self.unit_code} is still current")
+                self._entry = self.cache.touch(entry)
+                self.source = "revalidated"
+                return self.cache.html(entry)
             response.raise_for_status()
-            return response.text
         except requests.exceptions.HTTPError as e:
             logging.error(f"Failed to fetch page {self.url}: {e}")
             raise UnitOfCompetencyNotFoundError(self.unit_code) from e
+        except requests.exceptions.RequestException as e:
+            # Timeouts, connection errors and exhausted retries
+            logging.error(f"Failed to fetch page {self.url}: {e}")
+            raise UnitOfCompetencyError(f"Failed to fetch page {self.url}") from e
+
+        self._entry = self.cache.store(
+            self.unit_code,
+            self.url,
+            response.text,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        self.source = "network"
+        return response.text
 
     def _get_data(self, sections: Iterable[UOCSections]) -> UnitOfCompetencyData:
         """
         Extract relevant data from the web page based on the specified sections.
         """
         data_dict = {"unit_code": self.unit_code, "aqf_level": self.aqf_level}
-
         for section in sections:
-            if section == UOCSections.ELEMENTS_AND_CRITERIA:
-                data_dict[section.attribute_name] = (
-                    self._get_elements_and_performance_criteria()
-                )
-            else:
-                data_dict[section.attribute_name] = self._get_section_text(
-                    section.value
-                )
+            data_dict[section.attribute_name] = getattr(self, section.attribute_name)
         return UnitOfCompetencyData(**data_dict)
 
+    def _get_section(self, section: UOCSections):
+        """
+        Return a section from the cache, parsing (and caching) it if needed.
+        """
+        if section.attribute_name in self._cached_sections:
+            return self._cached_sections[section.attribute_name]
+
+        if section == UOCSections.ELEMENTS_AND_CRITERIA:
+            value = self._get_elements_and_performance_criteria()
+        else:
+            value = self._get_section_text(section.value)
+        if self._entry:
+            self.cache.store_section(
+                self._entry, section.attribute_name, value, self.lean
+            )
+        return value
+
     def _get_section_text(self, section: str) -> str:
         """
         Extract the text from a specific section of the web page.
         """
-        # Locate the section header
-        if not (section_header := self._soup.find("h2", string=section)):
+        # Locate the section
+        if not (indexed := self._sections.get(section)):
             raise UnitOfCompetencyError(f"Could not find {section} section")
 
         # Extract relevant text based on sibling elements of the section header
         text = ""
-        for sibling in section_header.find_next_siblings():
-            if sibling.name and sibling.name.startswith("h2"):  # type: ignore
-                break
-            if sibling.name == "p":  # type: ignore
+        for sibling in indexed[1]:
+            if sibling.name == "p":
                 text += sibling.get_text(strip=True) + "\n"
-            elif sibling.name == "ul":  # type: ignore
+            elif sibling.name == "ul":
                 text += (
                     "\n".join(
-                        [
-                            li.get_text(strip=True) for li in sibling.find_all("li")  # type: ignore
-                        ]
+                        [li.get_text(strip=True) for li in sibling.find_all("li")]
                     )
                     + "\n"
                 )
@@ -252,18 +635,22 @@ class UnitOfCompetency:
         """
         Extract the elements and performance criteria from the web page.
         """
-        # Locate the section header for elements and performance criteria
-        if elements_header := self._soup.find(
-            "h2", string=UOCSections.ELEMENTS_AND_CRITERIA.value
-        ):
+        # Locate the section for elements and performance criteria
+        if indexed := self._sections.get(UOCSections.ELEMENTS_AND_CRITERIA.value):
+            elements_header, siblings = indexed
+            tables = (
+                sibling if sibling.name == "table" else sibling.find("table")
+                for sibling in siblings
+            )
+            table = next(filter(None, tables), None) or elements_header.find_next(
+                "table"
+            )
             # Extract data from the table rows
             return {
                 row.find_all("td")[0]
                 .get_text(strip=True): row.find_all("td")[1]
                 .get_text(strip=False)
-                for row in elements_header.find_next("table").find_all("tr")[  # type: ignore
-                    2:
-                ]
+                for row in table.find_all("tr")[2:]  # type: ignore
             }
         raise UnitOfCompetencyError(
             f"Could not find {UOCSections.ELEMENTS_AND_CRITERIA.value} section"
@@ -293,14 +680,132 @@ class UnitOfCompetency:
         return f"{class_name}({self.unit_code!r}, {self.sections!r})"
 
 
+def _normalize(value):
+    """
+    Collapse whitespace in every string of a (nested) section value.
+    """
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {_normalize(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def _warm(uoc: UnitOfCompetency) -> str:
+    # Units are lazy, hashing their content fetches the page and parses (and caches)
+    # every section and list
+    return uoc.content_hash
+
+
+def prefetch(
+    unit_codes: Iterable[str], max_workers: int = MAX_WORKERS, **kwargs
+) -> dict[str, UnitOfCompetency]:
+    """
+    Fetch and parse several units concurrently through a bounded thread pool.
+
+    :param unit_codes: Unit codes to fetch, duplicates are only fetched once.
+    :param max_workers: Maximum number of units fetched at the same time.
+    :param kwargs: Passed on to each UnitOfCompetency.
+    :return: Dictionary of unit code to UnitOfCompetency, in the order given.
+    """
+    unit_codes = list(dict.fromkeys(unit_codes))
+    if not unit_codes:
+        return {}
+    logger.debug(f"Prefetching {len(unit_codes)} units")
+    units = {
+        unit_code: UnitOfCompetency(unit_code, **kwargs) for unit_code in unit_codes
+    }
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(unit_codes)))
+    ) as pool:
+        futures = [pool.submit(_warm, uoc) for uoc in units.values()]
+    for future in futures:
+        future.result()
+    return units
+
+
+def course_unit_codes(course_directory: Path) -> list[str]:
+    """
+    Collect the unit codes referenced by a course's assessment.md and fields.md front matter.
+    """
+    unit_codes = []
+    for name in ("fields.md", "assessment.md"):
+        for path in sorted(course_directory.rglob(name)):
+            units = frontmatter.load(path).get("units") or []
+            unit_codes.extend(unit["id"] for unit in units if unit.get("id"))
+    return list(dict.fromkeys(unit_codes))
+
+
+@app.command()
+def warm_cache(
+    unit_names: list[str] = typer.Argument(
+        None, help="training.gov.au unit of competency codes"
+    ),
+    course: Path = typer.Option(
+        None,
+        exists=True,
+        file_okay=False,
+        help="Course content folder, every unit in its assessment.md and fields.md is cached",
+    ),
+    max_workers: int = typer.Option(MAX_WORKERS, help="Units fetched at once"),
+):
+    """
+    Fetch, parse and cache units so later generation runs can work offline.
+    """
+    unit_codes = list(
+        dict.fromkeys(
+            [*(unit_names or []), *(course_unit_codes(course) if course else [])]
+        )
+    )
+    if not unit_codes:
+        raise typer.BadParameter("Give unit codes and/or a --course folder")
+
+    units = [UnitOfCompetency(unit_code) for unit_code in unit_codes]
+    failed: dict[str, Exception] = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(_warm, uoc): uoc for uoc in units}
+        for future in track(
+            as_completed(futures), total=len(futures), description="Caching units"
+        ):
+            if error := future.exception():
+                failed[futures[future].unit_code] = error
+
+    sources = [uoc.source for uoc in units if uoc.unit_code not in failed]
+    print(
+        f"Cached {len(sources)} of {len(units)} units: "
+        + ", ".join(
+            f"{sources.count(source)} {label}"
+            for source, label in (
+                ("network", "downloaded"),
+                ("revalidated", "unchanged since last fetch"),
+                ("cache", "already fresh"),
+            )
+        )
+    )
+    for unit_code, error in failed.items():
+        print(f"[red]Failed to cache {unit_code}: {error}[/red]")
+    if failed:
+        raise typer.Exit(1)
+
+
 @app.command()
 def print_uoc(
-    unit_name: str = typer.Option(..., help="training.gov.au unit of competency code")
+    unit_name: str = typer.Option(..., help="training.gov.au unit of competency code"),
+    offline: bool = typer.Option(
+        False, help="Only use cached pages, never touch the network"
+    ),
+    section: list[UOCSections] = typer.Option(
+        [], help="Only print these sections (default: all)"
+    ),
 ):
     """
     Command-line function to print the Unit of Competency data.
     """
-    print(UnitOfCompetency(unit_name))
+    if offline:
+        CACHE.offline = True
+    print(UnitOfCompetency(unit_name, sections=section or UOCSections))
 
 
 @app.command()
@@ -323,7 +828,7 @@ def main(
     uoc = UnitOfCompetency(unit_name)
     print(uoc.data)
     print("#" * 80)
-    print_uoc(unit_name)
+    print_uoc(unit_name, offline=CACHE.offline, section=[])
     print("#" * 80)
     print("#" * 80)
     result = template.render(uoc=uoc)
@@ -0,0 +1,249 @@
+"""Local SQLite store of parsed training.gov.au units of competency"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+
+from dataclasses import dataclass
+from os import environ as env
+from pathlib import Path
+
+import typer
+
+from rich import print
+
+from src.utils.uoc import (
+    CACHE_DIR,
+    MAX_WORKERS,
+    UOCSections,
+    UnitOfCompetency,
+    UnitOfCompetencyData,
+    course_unit_codes,
+    prefetch,
+)
+
+logger = logging.getLogger(__name__)
+app = typer.Typer()
+
+STORE_PATH = Path(env.get("UOC_STORE", CACHE_DIR / "units.sqlite3")).expanduser()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    unit_code TEXT NOT NULL,
+    release TEXT NOT NULL,
+    aqf_level INTEGER NOT NULL,
+    application TEXT NOT NULL,
+    performance_evidence TEXT NOT NULL,
+    knowledge_evidence TEXT NOT NULL,
+    -- json encoded dictionaries
+    elements_and_criteria TEXT NOT NULL,
+    knowledge_criteria TEXT NOT NULL,
+    performance_criteria TEXT NOT NULL,
+    assessment_conditions TEXT NOT NULL,
+    imported_at REAL NOT NULL,
+    PRIMARY KEY (unit_code, release)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS criteria USING fts5(
+    unit_code UNINDEXED, release UNINDEXED, section UNINDEXED, text
+);
+"""
+
+
+@dataclass
+class StoredUnit:
+    """
+    A unit of competency as imported into the store.
+    """
+
+    release: str
+    data: UnitOfCompetencyData
+    knowledge_criteria: dict[str, list[str]]
+    performance_criteria: dict[str, list[str]]
+    assessment_conditions: dict[str, list[str]]
+
+
+@dataclass
+class SearchResult:
+    """
+    A criteria text matching a full text search.
+    """
+
+    unit_code: str
+    release: str
+    section: str
+    text: str
+
+
+class UnitStore:
+    """
+    SQLite database of parsed units keyed by unit code and release.
+
+    Besides the unit data, every element criterion, knowledge/performance point and
+    assessment condition is indexed for full text search.
+    """
+
+    def __init__(self, path: Path | str = STORE_PATH):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self) -> UnitStore:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def import_unit(self, uoc: UnitOfCompetency):
+        """
+        Store a unit and index its criteria, replacing any previous import of its release.
+        """
+        data = uoc._get_data(UOCSections)
+        lists = {
+            "knowledge_criteria": uoc.parse_knowledge_criteria(),
+            "performance_criteria": uoc.parse_performance_evidence(),
+            "assessment_conditions": uoc.parse_assessment_conditions(),
+        }
+        key = (uoc.unit_code, uoc.release)
+
+        rows = [("application", data.application)]
+        for element, criteria in data.elements_and_criteria.items():
+            rows.append(("elements_and_criteria", element))
+            rows.extend(
+                ("elements_and_criteria", criterium)
+                for criterium in criteria.strip().split("\n")
+                if criterium.strip()
+            )
+        for section, points in lists.items():
+            for point, sub_points in points.items():
+                rows.append((section, point))
+                rows.extend((section, sub_point) for sub_point in sub_points)
+
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM criteria WHERE unit_code = ? AND release = ?", key
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO units VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    *key,
+                    data.aqf_level,
+                    data.application,
+                    data.performance_evidence,
+                    data.knowledge_evidence,
+                    json.dumps(data.elements_and_criteria),
+                    *(json.dumps(value) for value in lists.values()),
+                    time.time(),
+                ),
+            )
+            self._connection.executemany(
+                "INSERT INTO criteria VALUES (?, ?, ?, ?)",
+                [(*key, section, text) for section, text in rows],
+            )
+        logger.debug(f"Imported {uoc.unit_code} release {uoc.release} into {self.path}")
+
+    def get(self, unit_code: str, release: str | None = None) -> StoredUnit | None:
+        """
+        Return a stored unit, the latest imported release unless one is given.
+        """
+        query = "SELECT * FROM units WHERE unit_code = ?"
+        params = [unit_code]
+        if release is not None:
+            query += " AND release = ?"
+            params.append(release)
+        query += " ORDER BY CAST(release AS INTEGER) DESC LIMIT 1"
+        if not (row := self._connection.execute(query, params).fetchone()):
+            return None
+
+        _, release, aqf_level, application, performance, knowledge, *lists, _ = row
+        elements, knowledge_criteria, performance_criteria, conditions = map(
+            json.loads, lists
+        )
+        return StoredUnit(
+            release,
+            UnitOfCompetencyData(
+                unit_code, aqf_level, application, performance, knowledge, elements
+            ),
+            knowledge_criteria,
+            performance_criteria,
+            conditions,
+        )
+
+    def unit_codes(self) -> list[str]:
+        return [
+            unit_code
+            for (unit_code,) in self._connection.execute(
+                "SELECT DISTINCT unit_code FROM units ORDER BY unit_code"
+            )
+        ]
+
+    def search(
+        self, query: str, unit_code: str | None = None, limit: int = 50
+    ) -> list[SearchResult]:
+        """
+        Full text search of the criteria of every stored unit, best matches first.
+
+        :param query: SQLite FTS5 query, e.g. 'machine learning' or 'privacy OR security'.
+        :param unit_code: Only search this unit.
+        :param limit: Maximum number of results.
+        """
+        sql = "SELECT unit_code, release, section, text FROM criteria WHERE criteria MATCH ?"
+        params: list = [query]
+        if unit_code:
+            sql += " AND unit_code = ?"
+            params.append(unit_code)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        return [SearchResult(*row) for row in self._connection.execute(sql, params)]
+
+
+@app.command("import")
+def import_units(
+    unit_names: list[str] = typer.Argument(
+        None, help="training.gov.au unit of competency codes"
+    ),
+    course: Path = typer.Option(
+        None,
+        exists=True,
+        file_okay=False,
+        help="Course content folder, every unit in its assessment.md and fields.md is imported",
+    ),
+    store: Path = typer.Option(STORE_PATH, help="SQLite database to import into"),
+    max_workers: int = typer.Option(MAX_WORKERS, help="Units fetched at once"),
+):
+    """
+    Fetch, parse and import units into the local unit store.
+    """
+    unit_codes = [*(unit_names or []), *(course_unit_codes(course) if course else [])]
+    if not unit_codes:
+        raise typer.BadParameter("Give unit codes and/or a --course folder")
+    units = prefetch(unit_codes, max_workers=max_workers)
+    with UnitStore(store) as unit_store:
+        for uoc in units.values():
+            unit_store.import_unit(uoc)
+    print(f"Imported {len(units)} units into {store}")
+
+
+@app.command()
+def search(
+    query: str = typer.Argument(..., help="Full text query, e.g. 'machine learning'"),
+    unit_name: str = typer.Option(None, help="Only search this unit"),
+    store: Path = typer.Option(STORE_PATH, help="SQLite database to search"),
+):
+    """
+    Search the criteria of every stored unit.
+    """
+    with UnitStore(store) as unit_store:
+        for result in unit_store.search(query, unit_name):
+            print(f"{result.unit_code} [{result.section}] {result.text}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,109 @@
+import os
+import shutil
+
+from pathlib import Path
+
+import pytest
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# The generator modules read these at import time
+os.environ.setdefault("COURSE_CONTENT", str(FIXTURES / "course"))
+os.environ.setdefault("OUTPUT_LOCATION", str(FIXTURES))
+
+from src.utils import uoc as uoc_module
+from src.utils.uoc import UnitOfCompetency, UnitOfCompetencyCache
+from tests.tga_server import TrainingGovServer, load_pages
+from tests.helpers import png
+
+LAP_FIELDS = """---
+qualification_national_code_and_title: ICT50220 Diploma of Information Technology
+delivery_period: Semester 1
+cluster_name: Machine Learning
+units:
+  - id: ICTAII501
+    name: Design machine learning solutions
+lecturers:
+  - name: A Lecturer
+    email: lecturer@example.com
+assessments:
+  - title: Identify Opportunities for Machine Learning
+    description: Case study
+    due_date: Week 4
+---
+"""
+LAP_TOPICS = """---
+session_hours: 4
+out_of_class_hours: 2
+total_session_hours: 8
+total_out_of_class_hours: 4
+total_training: 12
+---
+# Introduction
+
+- What machine learning is
+
+# Opportunities
+
+![logo]({logo})
+"""
+LAP_ELEMENTS = """---
+sessions:
+  - - name: ICTAII501
+      performance: ["1.1"]
+  - - name: ICTAII501
+      performance: ["1.2", "2.1"]
+---
+"""
+
+
+@pytest.fixture
+def tga_server(request, monkeypatch):
+    """
+    Local training.gov.au stand-in, UnitOfCompetency fetches from it for the test.
+
+    Latency can be injected by parametrizing indirectly with TrainingGovServer
+    keyword arguments, e.g. ``{"latency": 0.2, "jitter": 0.05}``.
+    """
+    options = getattr(request, "param", {})
+    with TrainingGovServer(load_pages(), **options) as server:
+        monkeypatch.setattr(UnitOfCompetency, "base_url", server.base_url)
+        yield server
+
+
+@pytest.fixture
+def course(tmp_path):
+    """
+    Copy of the fixture course content that tests are free to edit.
+    """
+    course = tmp_path / "course"
+    shutil.copytree(FIXTURES / "course", course)
+    return course
+
+
+@pytest.fixture
+def offline_units(tmp_path, monkeypatch):
+    """
+    Offline unit cache holding every fixture unit page, used by default for the test.
+    """
+    cache = UnitOfCompetencyCache(tmp_path / "uoc_cache", offline=True)
+    for unit_code, html in load_pages().items():
+        cache.store(unit_code, UnitOfCompetency.base_url + unit_code, html)
+    monkeypatch.setattr(uoc_module, "CACHE", cache)
+    return cache
+
+
+@pytest.fixture
+def lap_course(course):
+    """
+    The fixture course with a small LAP of two topics, the second showing an image.
+    """
+    lap = course / "2 KAD" / "1 LAP"
+    lap.mkdir()
+    (lap / "logo.png").write_bytes(png(4, 3))
+    (lap / "fields.md").write_text(LAP_FIELDS)
+    (lap / "topics.md").write_text(LAP_TOPICS.format(logo=lap / "logo.png"))
+    (lap / "elements.md").write_text(LAP_ELEMENTS)
+    (lap / "resources.md").write_text("Slides\n---\nCase study\n")
+    (lap / "activities.md").write_text("Reading\n---\nQuiz\n")
+    return course
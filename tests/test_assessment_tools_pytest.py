@@ -0,0 +1,46 @@
+import shutil
+
+import pytest
+
+from src.assessment_tools import (
+    ASSESSMENTS,
+    OUTPUT_FILE,
+    AssessmentToolErrors,
+    assess_tool,
+)
+from tests.helpers import contents
+
+
+def test_workers_generate_identical_tools(course, tmp_path):
+    serial, parallel = tmp_path / "serial", tmp_path / "parallel"
+    serial.mkdir()
+    parallel.mkdir()
+
+    outputs = assess_tool(course, serial)
+    assert len(outputs) == 2
+    assert assess_tool(course, parallel, max_workers=2) == [
+        parallel / output.relative_to(serial) for output in outputs
+    ]
+    for output in outputs:
+        assert contents(output) == contents(parallel / output.relative_to(serial))
+
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_errors_are_collected_per_assessment(course, tmp_path, max_workers):
+    broken = course / ASSESSMENTS / "AT3 Broken"
+    shutil.copytree(course / ASSESSMENTS / "AT2 Knowledge Based Assessment", broken)
+    markdown = broken / "assessment.md"
+    markdown.write_text(markdown.read_text().replace("units:", "no_units:", 1))
+    output = tmp_path / "output"
+    output.mkdir()
+
+    with pytest.raises(AssessmentToolErrors) as error:
+        assess_tool(course, output, max_workers=max_workers)
+
+    assert list(error.value.errors) == [markdown]
+    assert isinstance(error.value.errors[markdown], TypeError)
+    generated = sorted(path.parent.name for path in output.rglob(OUTPUT_FILE.name))
+    assert generated == [
+        "AT1 Identify Opportunities for ML",
+        "AT2 Knowledge Based Assessment",
+    ]
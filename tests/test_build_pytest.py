@@ -0,0 +1,144 @@
+import pytest
+
+from src import assessment_tools
+from src.assessment_tools import tool_output
+from src.build import BuildErrors, Course, Task, build, documents, run_tasks, select
+from src.lap import OUTPUT_FILE as LAP_FILE, TOPICS
+from src.mapping_matrix import MAPPING_MATRIX, OUTPUT_FILE
+from src.utils import markdown
+from src.utils.manifest import Manifest
+from tests.helpers import contents, png
+
+
+def fail():
+    raise KeyError("missing")
+
+
+def test_targets_select_their_dependencies(course, tmp_path):
+    tasks = documents(Course.read(course), tmp_path, Manifest(tmp_path))
+
+    assert list(select(tasks)) == [task.name for task in tasks]
+    assert list(select(tasks, ["matrix:ICTAII501"])) == [
+        "unit:ICTAII501",
+        "matrix:ICTAII501",
+    ]
+    assert list(select(tasks, ["tools"])) == [
+        "tool:AT1 Identify Opportunities for ML",
+        "tool:AT2 Knowledge Based Assessment",
+    ]
+    with pytest.raises(ValueError):
+        select(tasks, ["matrix:ICTPRG443"])
+
+
+def test_failed_tasks_skip_their_dependents():
+    tasks = {
+        "a": Task("a", fail, kind="io"),
+        "b": Task("b", str.upper, deps=("a",)),
+        "c": Task("c", lambda: "c"),
+        "d": Task("d", str.__add__, deps=("c", "c")),
+    }
+
+    run = run_tasks(tasks)
+
+    assert run.results == {"c": "c", "d": "cc"}
+    assert isinstance(run.errors["a"], KeyError)
+    assert "a failed" in str(run.errors["b"])
+
+
+def test_workers_build_identical_documents(course, tmp_path, offline_units):
+    serial, parallel = tmp_path / "serial", tmp_path / "parallel"
+    serial.mkdir()
+    parallel.mkdir()
+
+    run = build(course, serial, ["tools", "matrices"])
+    build(course, parallel, ["tools", "matrices"], max_workers=2)
+
+    outputs = [
+        run.results["tool:AT1 Identify Opportunities for ML"],
+        run.results["tool:AT2 Knowledge Based Assessment"],
+        run.results["matrix:ICTAII501"].output,
+    ]
+    for output in outputs:
+        assert contents(output) == contents(parallel / output.relative_to(serial))
+
+
+def test_unchanged_matrices_are_skipped(course, tmp_path, offline_units):
+    output = tmp_path / MAPPING_MATRIX / f"ICTAII501 {OUTPUT_FILE}"
+    build(course, tmp_path, ["matrices"])
+    generated = output.stat().st_mtime_ns
+
+    assert build(course, tmp_path, ["matrices"]).results["matrix:ICTAII501"].skipped
+    assert output.stat().st_mtime_ns == generated
+    build(course, tmp_path, ["matrices"], force=True)
+    assert output.stat().st_mtime_ns != generated
+
+
+def test_unchanged_laps_are_skipped(lap_course, tmp_path, monkeypatch):
+    output = tmp_path / LAP_FILE
+    assert "lap" in build(lap_course, tmp_path, ["lap"]).results
+    generated = output.stat().st_mtime_ns
+
+    assert "lap" not in build(lap_course, tmp_path, ["lap"]).results
+    assert output.stat().st_mtime_ns == generated
+
+    topics = lap_course / TOPICS
+    topics.write_text(topics.read_text().replace("What machine", "What is machine"))
+    build(lap_course, tmp_path, ["lap"])
+    assert output.stat().st_mtime_ns != generated
+    generated = output.stat().st_mtime_ns
+
+    # Shown in a topic
+    (topics.parent / "logo.png").write_bytes(png(8, 3))
+    build(lap_course, tmp_path, ["lap"])
+    assert output.stat().st_mtime_ns != generated
+    generated = output.stat().st_mtime_ns
+
+    monkeypatch.setitem(markdown.ENGINE_VERSIONS, markdown.MARKDOWN_ENGINE, "test")
+    build(lap_course, tmp_path, ["lap"])
+    assert output.stat().st_mtime_ns != generated
+
+
+def test_errors_are_collected_per_task(course, tmp_path, offline_units):
+    with pytest.raises(BuildErrors) as error:
+        build(course, tmp_path)
+
+    # The fixture course has no LAP content
+    assert list(error.value.errors) == ["lap"]
+    assert (tmp_path / MAPPING_MATRIX / f"ICTAII501 {OUTPUT_FILE}").is_file()
+
+
+def test_only_documents_with_changed_inputs_are_built(
+    course, tmp_path, offline_units, monkeypatch
+):
+    at1, at2 = sorted(course.rglob("assessment.md"))
+    outputs = [
+        tool_output(tmp_path, at1),
+        tool_output(tmp_path, at2),
+        tmp_path / MAPPING_MATRIX / f"ICTAII501 {OUTPUT_FILE}",
+    ]
+
+    def built() -> list[bool]:
+        stamps = [output.stat().st_mtime_ns for output in outputs]
+        build(course, tmp_path, ["tools", "matrices"])
+        return [
+            output.stat().st_mtime_ns != stamp for output, stamp in zip(outputs, stamps)
+        ]
+
+    build(course, tmp_path, ["tools", "matrices"])
+    assert built() == [False, False, False]
+
+    at2.write_text(at2.read_text().replace("own words", "own words.", 1))
+    assert built() == [False, True, True]
+
+    monkeypatch.setattr(assessment_tools, "GENERATOR_VERSION", "test")
+    assert built() == [True, True, False]
+
+    engine = markdown.MARKDOWN_ENGINE
+    monkeypatch.setitem(markdown.ENGINE_VERSIONS, engine, "test")
+    assert built() == [True, True, False]
+
+    stamps = [output.stat().st_mtime_ns for output in outputs]
+    build(course, tmp_path, ["tools", "matrices"], force=True)
+    assert all(
+        output.stat().st_mtime_ns != stamp for output, stamp in zip(outputs, stamps)
+    )
@@ -0,0 +1,50 @@
+from docx import Document
+
+from src.utils.images import load_image
+from src.utils.markdown import markdown_to_word
+from tests.helpers import png
+
+TEMPLATE = "templates/Learning and Assessment Plan (F122A14).docx"
+
+
+def test_repeated_images_share_one_part(tmp_path):
+    path = tmp_path / "logo.png"
+    path.write_bytes(png(4, 3))
+    text = f"![logo]({path})\n" * 3
+    documents = [Document(TEMPLATE), Document(TEMPLATE)]
+
+    for document in documents:
+        markdown_to_word(text, document, document.tables[5].cell(2, 3))
+        markdown_to_word(text, document)
+
+        shapes = [shape._inline for shape in document.inline_shapes]
+        assert len(shapes) == 6
+        r_ids = {shape.graphic.graphicData.pic.blipFill.blip.embed for shape in shapes}
+        assert len(r_ids) == 1
+        assert len({shape.docPr.id for shape in shapes}) == 6
+        # The template's two images and ours
+        assert len(document.part.package.image_parts) == 3
+    assert load_image(path) is load_image(path)
+
+
+def test_changed_images_are_reloaded(tmp_path):
+    path = tmp_path / "logo.png"
+    path.write_bytes(png(4, 3))
+    assert load_image(path).px_width == 4
+
+    path.write_bytes(png(8, 3))
+    assert load_image(path).px_width == 8
+
+
+def test_shape_ids_follow_pictures_added_elsewhere(tmp_path):
+    path = tmp_path / "logo.png"
+    path.write_bytes(png(4, 3))
+    document = Document(TEMPLATE)
+
+    markdown_to_word(f"![logo]({path})", document)
+    document.add_paragraph().add_run().add_picture(str(path))
+    markdown_to_word(f"![logo]({path})\n![logo]({path})", document, backend="oxml")
+
+    shapes = [shape._inline for shape in document.inline_shapes]
+    assert len(shapes) == 4
+    assert len({shape.docPr.id for shape in shapes}) == 4
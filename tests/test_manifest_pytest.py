@@ -0,0 +1,39 @@
+import json
+
+from src.utils.manifest import MANIFEST, Manifest, file_hash, markdown_inputs
+from tests.helpers import png
+
+
+def test_markdown_inputs_follow_images(tmp_path):
+    image = tmp_path / "logo.png"
+    image.write_bytes(png(4, 3))
+    markdown = tmp_path / "assessment.md"
+    markdown.write_text(f"# Task\n\n![logo]({image})\n")
+
+    inputs = markdown_inputs(markdown)
+    assert inputs[str(markdown)] == file_hash(markdown)
+    assert markdown_inputs(tmp_path / "missing.md") == {
+        str(tmp_path / "missing.md"): None
+    }
+
+    image.write_bytes(png(8, 3))
+    assert markdown_inputs(markdown) != inputs
+
+
+def test_manifest_records_documents(tmp_path):
+    output = tmp_path / "2 KAD" / "tool.docx"
+    inputs = {"generator": "test 1", "template": "abc"}
+    manifest = Manifest(tmp_path)
+    manifest.record(output, inputs)
+    manifest.save()
+
+    assert not Manifest(tmp_path).is_current(output, inputs)
+    output.parent.mkdir()
+    output.write_bytes(b"")
+    assert Manifest(tmp_path).is_current(output, inputs)
+    assert not Manifest(tmp_path).is_current(output, {**inputs, "template": "def"})
+
+    # Recorded by another manifest version
+    recorded = json.loads((tmp_path / MANIFEST).read_text())
+    (tmp_path / MANIFEST).write_text(json.dumps({**recorded, "version": 0}))
+    assert not Manifest(tmp_path).is_current(output, inputs)
@@ -0,0 +1,118 @@
+import logging
+
+import pytest
+from docx import Document
+
+from src.mapping_matrix import (
+    MAPPING_MATRIX,
+    OUTPUT_FILE,
+    MappingMatrixErrors,
+    mapping_matrix,
+)
+from src.utils.manifest import Manifest
+from src.utils.uoc import UnitOfCompetencyError
+from tests.helpers import contents
+from tests.tga_server import load_pages
+
+ASSESSMENT = "2 KAD/5 Assess Tool/AT2 Knowledge Based Assessment/assessment.md"
+
+
+def test_mapping_matrix(course, tmp_path, offline_units):
+    mapping_matrix(course, tmp_path)
+
+    output = tmp_path / MAPPING_MATRIX / f"ICTAII501 {OUTPUT_FILE}"
+    table = Document(output).tables[0]
+    assert table.cell(1, 1).text == "Identify Opportunities for Machine Learning"
+    assert table.cell(1, 2).text == "Knowledge Based Assessment"
+    assert table.cell(4, 0).text.startswith("1.1 Review business requirements")
+    assert table.cell(4, 1).text == "1"
+
+
+def test_unchanged_matrices_are_skipped(course, tmp_path, offline_units):
+    output = tmp_path / MAPPING_MATRIX / f"ICTAII501 {OUTPUT_FILE}"
+    mapping_matrix(course, tmp_path)
+    generated = output.stat().st_mtime_ns
+
+    mapping_matrix(course, tmp_path)
+    assert output.stat().st_mtime_ns == generated
+
+    mapping_matrix(course, tmp_path, force=True)
+    assert output.stat().st_mtime_ns != generated
+    generated = output.stat().st_mtime_ns
+
+    (course / ASSESSMENT).write_text(
+        (course / ASSESSMENT).read_text().replace("own words", "own words.")
+    )
+    mapping_matrix(course, tmp_path)
+    assert output.stat().st_mtime_ns != generated
+
+
+def test_changed_unit_content_is_reported(course, tmp_path, offline_units, caplog):
+    mapping_matrix(course, tmp_path)
+
+    html = load_pages()["ICTAII501"]
+    offline_units.store(
+        "ICTAII501", "", html.replace("data privacy", "data privacy and security")
+    )
+    with caplog.at_level(logging.WARNING):
+        mapping_matrix(course, tmp_path)
+
+    assert "ICTAII501 content on training.gov.au has changed" in caplog.text
+
+
+def add_unit(course, unit: str):
+    assessment = course / ASSESSMENT
+    assessment.write_text(
+        assessment.read_text().replace(
+            "units:\n", f"units:\n  - id: {unit}\n    name: {unit}\n", 1
+        )
+    )
+
+
+def test_workers_render_identical_matrices(course, tmp_path, offline_units):
+    add_unit(course, "ICTAII502")
+    serial, parallel = tmp_path / "serial", tmp_path / "parallel"
+    serial.mkdir()
+    parallel.mkdir()
+
+    results = mapping_matrix(course, serial)
+    assert [result.id for result in results] == ["ICTAII501", "ICTAII502"]
+    assert [
+        result.output for result in mapping_matrix(course, parallel, max_workers=2)
+    ] == [parallel / result.output.relative_to(serial) for result in results]
+    for result in results:
+        assert contents(result.output) == contents(
+            parallel / result.output.relative_to(serial)
+        )
+    assert Manifest(serial).documents == Manifest(parallel).documents
+
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_errors_are_collected_per_unit(course, tmp_path, offline_units, max_workers):
+    # More elements than the template has rows for
+    add_unit(course, "ICTAII401")
+
+    with pytest.raises(MappingMatrixErrors) as error:
+        mapping_matrix(course, tmp_path, max_workers=max_workers)
+
+    assert list(error.value.errors) == ["ICTAII401"]
+    assert (tmp_path / MAPPING_MATRIX / f"ICTAII501 {OUTPUT_FILE}").is_file()
+    assert not (tmp_path / MAPPING_MATRIX / f"ICTAII401 {OUTPUT_FILE}").exists()
+    assert list(Manifest(tmp_path).documents) == [
+        (MAPPING_MATRIX / f"ICTAII501 {OUTPUT_FILE}").as_posix()
+    ]
+
+
+def test_units_that_cant_be_fetched_fail_their_matrix(course, tmp_path, offline_units):
+    # Not in the offline cache
+    add_unit(course, "ICTSAS999")
+
+    with pytest.raises(MappingMatrixErrors) as error:
+        mapping_matrix(course, tmp_path)
+
+    assert list(error.value.errors) == ["ICTSAS999"]
+    assert isinstance(error.value.errors["ICTSAS999"], UnitOfCompetencyError)
+    assert (tmp_path / MAPPING_MATRIX / f"ICTAII501 {OUTPUT_FILE}").is_file()
+    assert list(Manifest(tmp_path).documents) == [
+        (MAPPING_MATRIX / f"ICTAII501 {OUTPUT_FILE}").as_posix()
+    ]
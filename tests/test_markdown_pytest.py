@@ -0,0 +1,291 @@
+import copyreg
+import os
+import pickle
+from types import MappingProxyType
+
+import pytest
+
+from docx import Document
+from docx.oxml.shared import qn
+from docx.text.run import Run
+from lxml import etree
+
+from src.utils import markdown
+from src.utils.fragments import FragmentStore
+from src.utils.markdown import (
+    CacheInfo,
+    MarkdownCache,
+    apply_markdown_style,
+    engine_styles,
+    markdown_to_word,
+    render_fragments,
+    tokenize,
+)
+from tests.helpers import png
+
+TEMPLATE = "templates/Learning and Assessment Plan (F122A14).docx"
+
+
+@pytest.fixture
+def cell():
+    document = Document(TEMPLATE)
+    cell = document.tables[5].cell(2, 3)
+    cell.text = ""
+    return document, cell
+
+
+def run_text(paragraph) -> str:
+    # Paragraph.text leaves out hyperlinks with older python-docx versions
+    return "".join(Run(r, paragraph).text for r in paragraph._p.xpath(".//w:r"))
+
+
+def test_tokenize_mixed_inline_styles():
+    line = "- Some **bold**, *italic* and ```code``` see [guide](https://example.com)"
+    assert [span.style for span in tokenize(line)] == [
+        "bullets",
+        "bold/italic",
+        "bold/italic",
+        "code",
+        "link",
+    ]
+    assert tokenize("![alt](image.png)")[0].groups == ("alt", "image.png")
+
+
+def test_tokenize_targets_with_parentheses():
+    url = "https://en.wikipedia.org/wiki/Python_(programming_language)"
+    line = f"See [Python]({url}) and [guide](https://example.com)."
+    spans = tokenize(line)
+    assert [(span.style, span.groups) for span in spans] == [
+        ("link", ("Python", url)),
+        ("link", ("guide", "https://example.com")),
+    ]
+    assert line[spans[0].end : spans[1].start] == " and "
+    assert tokenize("![shot](Screenshot (1).png)")[0].groups == (
+        "shot",
+        "Screenshot (1).png",
+    )
+
+
+def test_mixed_inline_styles(cell):
+    document, cell = cell
+    apply_markdown_style(document, "Some **bold** and *italic* words", cell)
+
+    paragraph = cell.paragraphs[-1]
+    assert paragraph.text == "Some bold and italic words"
+    assert [(run.text, run.bold, run.italic) for run in paragraph.runs] == [
+        ("Some ", None, None),
+        ("bold", True, False),
+        (" and ", None, None),
+        ("italic", False, True),
+        (" words", None, None),
+    ]
+
+
+def test_headings_and_bullets(cell):
+    document, cell = cell
+    text = "## Heading **two**\n- one\n  - two *nested*\nplain"
+    apply_markdown_style(document, text, cell)
+
+    assert [(p.style.name, p.text) for p in cell.paragraphs[1:]] == [
+        ("Heading 2", "Heading two"),
+        ("List Bullet", "one"),
+        ("List Bullet 2", "two nested"),
+        ("Normal", "plain"),
+    ]
+    assert cell.paragraphs[1].runs[1].bold
+
+
+def test_markdown_it_lists_and_inline_styles(cell):
+    document, cell = cell
+    text = "- one **bold**\n  - two\n    - three\n\n1. first\n2. second with [link](https://example.com)"
+    markdown_to_word(text, document, cell, engine="markdown-it")
+
+    assert [(p.style.name, run_text(p)) for p in cell.paragraphs[1:]] == [
+        ("List Bullet", "one bold"),
+        ("List Bullet 2", "two"),
+        ("List Bullet 3", "three"),
+        ("List Number", "first"),
+        ("List Number", "second with link"),
+    ]
+    assert cell.paragraphs[1].runs[1].bold
+
+
+def test_engine_styles(monkeypatch):
+    # Only markdown-it renders numbered lists
+    assert "List Number" in engine_styles("markdown-it")
+    assert "List Number" not in engine_styles("regex")
+    monkeypatch.setattr(markdown, "MARKDOWN_ENGINE", "markdown-it")
+    assert engine_styles() == engine_styles("markdown-it")
+
+
+def test_unknown_markdown_engine(cell):
+    document, cell = cell
+    with pytest.raises(ValueError):
+        markdown_to_word("text", document, cell, engine="pandoc")
+
+
+def test_parse_md_cache(tmp_path):
+    path = tmp_path / "fields.md"
+    path.write_text("---\nunits:\n  - id: ICTAII501\n---\n# Topic <!-- note -->\n")
+    cache = MarkdownCache(maxsize=1)
+
+    post = cache.get(path)
+    assert post.content == "# Topic "
+    assert post["units"][0]["id"] == "ICTAII501"
+    assert cache.get(path) is post
+    assert cache.info() == CacheInfo(hits=1, misses=1, maxsize=1, currsize=1)
+
+    with pytest.raises(TypeError):
+        post["units"] = []
+    with pytest.raises(TypeError):
+        post["units"][0]["id"] = "ICTAII502"
+    with pytest.raises(AttributeError):
+        post.content = ""
+
+    path.write_text("---\nunits: []\n---\n")
+    assert cache.get(path)["units"] == ()
+    assert cache.info().misses == 2
+
+
+def test_parse_md_cache_content_hash(tmp_path):
+    path = tmp_path / "fields.md"
+    path.write_text("---\nname: one\n---\n")
+    stat = path.stat()
+    cache = MarkdownCache(content_hash=True)
+    assert cache.get(path)["name"] == "one"
+
+    # Same size and mtime, only the content hash differs
+    path.write_text("---\nname: two\n---\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.get(path)["name"] == "two"
+
+
+def test_frozen_posts_can_be_pickled(tmp_path):
+    path = tmp_path / "fields.md"
+    path.write_text("---\nunits:\n  - id: ICTAII501\n---\n# Topic\n")
+    post = pickle.loads(pickle.dumps(MarkdownCache().get(path)))
+
+    assert post.content == "# Topic"
+    assert post["units"][0]["id"] == "ICTAII501"
+    with pytest.raises(TypeError):
+        post["units"][0]["id"] = "ICTAII502"
+    # Without changing how read only mappings are pickled everywhere else
+    assert MappingProxyType not in copyreg.dispatch_table
+
+
+def test_continuation_lines_use_last_paragraph(cell):
+    document, cell = cell
+    markdown_to_word("Resources", document, cell)
+    last = markdown_to_word("See [guide](https://example.com)", document, cell)
+    assert last._p is cell.paragraphs[-1]._p
+    assert run_text(cell.paragraphs[-1]) == "ResourcesSee guide\n"
+
+    # The document body ends with its section properties rather than a paragraph
+    document.add_paragraph("Body")
+    markdown_to_word("```code```", document)
+    assert document.paragraphs[-1].text == "Bodycode"
+
+
+def test_repeated_links_share_a_relationship(cell):
+    document, cell = cell
+    rels = len(document.part.rels)
+    text = "\n".join(f"- [guide {i}](https://example.com/{i % 2})" for i in range(6))
+    markdown_to_word(text, document, cell)
+
+    links = cell._tc.xpath(".//w:hyperlink")
+    assert ["".join(link.itertext()) for link in links] == [
+        f"guide {i}" for i in range(6)
+    ]
+    assert len({link.get(qn("r:id")) for link in links}) == 2
+    assert len(document.part.rels) == rels + 2
+
+
+def rich_markdown(image) -> str:
+    return "\n".join(
+        (
+            "# Topic",
+            "Some **bold**, *italic* and ```code``` text",
+            "- point",
+            "  - nested point",
+            f"![logo]({image}) and ![missing](missing.png)",
+            "See [guide](https://example.com)",
+            "---",
+            "Last line",
+        )
+    )
+
+
+@pytest.mark.parametrize("engine", ["regex", "markdown-it"])
+def test_backends_write_identical_xml(tmp_path, engine):
+    image = tmp_path / "logo.png"
+    image.write_bytes(png(4, 3))
+    text = rich_markdown(image)
+
+    xml = []
+    for backend in ("docx", "oxml"):
+        document = Document(TEMPLATE)
+        cell = document.tables[5].cell(2, 3)
+        first = markdown_to_word(text, document, cell, engine, backend)
+        last = markdown_to_word(text, document, cell, engine, backend)
+        markdown_to_word(text, document, engine=engine, backend=backend)
+        assert first._p is not last._p and last._p is cell._tc.p_lst[-1]
+        xml.append(etree.tostring(document.element.body))
+
+    assert xml[0] == xml[1]
+
+
+def test_unknown_backend(cell):
+    document, cell = cell
+    with pytest.raises(ValueError):
+        markdown_to_word("text", document, cell, backend="html")
+
+
+def test_stored_fragments_write_identical_xml(tmp_path, monkeypatch):
+    image = tmp_path / "logo.png"
+    image.write_bytes(png(4, 3))
+    text = rich_markdown(image)
+
+    def render() -> bytes:
+        document = Document(TEMPLATE)
+        cell = document.tables[5].cell(2, 3)
+        markdown_to_word("Intro", document, cell)
+        last = markdown_to_word(text, document, cell)
+        assert last._p is cell._tc.p_lst[-1]
+        # Continues the last paragraph, so it is rendered every time
+        markdown_to_word("See [more](https://example.com/more)", document, cell)
+        markdown_to_word(text, document)
+        return etree.tostring(document.element.body)
+
+    expected = render()
+    store = FragmentStore(":memory:")
+    monkeypatch.setattr(markdown, "FRAGMENT_STORE", store)
+    # The body reuses the cell's fragment
+    assert render() == expected
+    assert store.info() == (1, 3, 2)
+    assert render() == expected
+    assert store.info() == (4, 4, 2)
+
+    # Fragments with a changed image are rendered again
+    image.write_bytes(png(8, 3))
+    assert render() != expected
+    assert store.info() == (6, 6, 2)
+
+
+def test_fragments_rendered_in_worker_processes(tmp_path):
+    image = tmp_path / "logo.png"
+    image.write_bytes(png(4, 3))
+    texts = [f"# Topic {i}\n{rich_markdown(image)}" for i in range(6)]
+    # Continues the cell's last paragraph, so it is left to markdown_to_word
+    texts.append("See [more](https://example.com/more)")
+
+    fragments = render_fragments(texts, TEMPLATE, max_workers=2)
+    assert len(fragments) == 6
+
+    xml = []
+    for fragments in (None, fragments):
+        document = Document(TEMPLATE)
+        for index, text in enumerate(texts):
+            cell = document.tables[5].cell(2 + index % 3, 3)
+            markdown_to_word(text, document, cell, fragments=fragments)
+        xml.append(etree.tostring(document.element.body))
+    assert xml[0] == xml[1]
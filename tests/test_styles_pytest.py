@@ -0,0 +1,33 @@
+import pytest
+
+from docx import Document
+
+from src.utils.styles import MissingStyleError, document_styles
+
+LAP_TEMPLATE = "templates/Learning and Assessment Plan (F122A14).docx"
+MATRIX_TEMPLATE = "templates/Assessment Mapping Matrix (F122A8).docx"
+
+
+def test_resolver_is_attached_to_document():
+    document = Document(LAP_TEMPLATE)
+    styles = document_styles(document).require()
+    assert document_styles(document) is styles
+
+    paragraph = styles.add_paragraph(document, "List Bullet 2")
+    assert paragraph.style.name == "List Bullet 2"
+    styles.apply(paragraph, "Normal")
+    assert paragraph._p.pPr.pStyle is None
+
+
+def test_missing_styles_fail_fast():
+    styles = document_styles(Document(MATRIX_TEMPLATE))
+    with pytest.raises(MissingStyleError) as error:
+        styles.require()
+    assert error.value.missing == [
+        "Heading 6",
+        "List Bullet",
+        "List Bullet 2",
+        "List Bullet 3",
+    ]
+    with pytest.raises(KeyError):
+        styles["code"]
@@ -0,0 +1,41 @@
+import io
+import shutil
+import zipfile
+
+from docx import Document
+
+from src.utils.templates import TEMPLATE_POOL, open_template
+
+LAP_TEMPLATE = "templates/Learning and Assessment Plan (F122A14).docx"
+MATRIX_TEMPLATE = "templates/Assessment Mapping Matrix (F122A8).docx"
+
+
+def saved(document) -> dict[str, bytes]:
+    output = io.BytesIO()
+    document.save(output)
+    with zipfile.ZipFile(output) as package:
+        return {name: package.read(name) for name in package.namelist()}
+
+
+def test_copies_are_independent_documents():
+    first, second = open_template(LAP_TEMPLATE), open_template(LAP_TEMPLATE)
+    assert TEMPLATE_POOL.get(LAP_TEMPLATE) is TEMPLATE_POOL.get(LAP_TEMPLATE)
+    assert saved(first) == saved(Document(LAP_TEMPLATE))
+
+    first.tables[5].cell(2, 3).text = "Changed"
+    first.add_paragraph("Added")
+    assert second.tables[5].cell(2, 3).text != "Changed"
+    assert saved(second) == saved(Document(LAP_TEMPLATE))
+
+    output = io.BytesIO()
+    first.save(output)
+    assert Document(output).paragraphs[-1].text == "Added"
+
+
+def test_changed_templates_are_reloaded(tmp_path):
+    path = tmp_path / "template.docx"
+    shutil.copy(LAP_TEMPLATE, path)
+    assert len(open_template(path).tables) == len(Document(LAP_TEMPLATE).tables)
+
+    shutil.copy(MATRIX_TEMPLATE, path)
+    assert len(open_template(path).tables) == len(Document(MATRIX_TEMPLATE).tables)
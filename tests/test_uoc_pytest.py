@@ -0,0 +1,320 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from typer.testing import CliRunner
+
+from src.utils import uoc as uoc_module
+from src.utils.uoc import (
+    UOCSections,
+    UnitOfCompetency,
+    UnitOfCompetencyCache,
+    UnitOfCompetencyError,
+    UnitOfCompetencyNotFoundError,
+    build_session,
+    prefetch,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures" / "uoc"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return UnitOfCompetencyCache(tmp_path / "cache", offline=True)
+
+
+def seed(cache: UnitOfCompetencyCache, unit_code: str):
+    html = (FIXTURES / f"{unit_code}.html").read_text(encoding="utf-8")
+    return cache.store(unit_code, UnitOfCompetency.base_url + unit_code, html)
+
+
+def test_offline_cache_hit(cache):
+    seed(cache, "ICTAII501")
+    uoc = UnitOfCompetency("ICTAII501", cache=cache)
+
+    assert uoc.data.application.startswith("This unit describes")
+    assert list(uoc.data.elements_and_criteria) == [
+        "1. Identify machine learning opportunities",
+        "2. Design machine learning solution",
+        "3. Finalise design",
+    ]
+
+
+def test_offline_cache_miss(cache):
+    uoc = UnitOfCompetency("ICTAII501", cache=cache)
+    with pytest.raises(UnitOfCompetencyError):
+        uoc.data
+
+
+def test_parsed_sections_are_cached(cache):
+    entry = seed(cache, "ICTAII501")
+    first = UnitOfCompetency("ICTAII501", [UOCSections.APPLICATION], cache=cache)
+    first.data
+
+    assert cache.data(entry) == {"application": first.application}
+
+    second = UnitOfCompetency("ICTAII501", cache=cache)
+    second.data
+    assert set(cache.data(entry)) == {section.attribute_name for section in UOCSections}
+    assert second.application == first.application
+
+    lists = (
+        second.parse_knowledge_criteria(),
+        second.parse_performance_evidence(),
+        second.parse_assessment_conditions(),
+    )
+    assert all(lists)
+    third = UnitOfCompetency("ICTAII501", cache=cache)
+    assert (
+        third.parse_knowledge_criteria(),
+        third.parse_performance_evidence(),
+        third.parse_assessment_conditions(),
+    ) == lists
+    # Read from the cache without parsing the page
+    assert "_soup" not in vars(third)
+
+
+def test_sections_stored_concurrently_are_kept(cache):
+    entry = seed(cache, "ICTAII501")
+    names = [f"section {i}" for i in range(32)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda name: cache.store_section(entry, name, name), names))
+    assert cache.data(entry) == {name: name for name in names}
+
+
+def test_parsed_sections_are_kept_per_parser(cache, monkeypatch):
+    entry = seed(cache, "ICTAII501")
+    full = UnitOfCompetency("ICTAII501", cache=cache, lean=False)
+    full.application
+
+    assert cache.data(entry, lean=True) == {}
+    lean = UnitOfCompetency("ICTAII501", cache=cache, lean=True)
+    lean.application
+    assert "_soup" in vars(lean)
+    assert (
+        cache.data(entry, lean=True)
+        == cache.data(entry)
+        == {"application": full.application}
+    )
+
+    # Parsed by another version of the parsing code
+    monkeypatch.setattr(uoc_module, "PARSER_VERSION", "test")
+    assert cache.data(entry) == {}
+    again = UnitOfCompetency("ICTAII501", cache=cache, lean=False)
+    assert again.application == full.application
+    assert "_soup" in vars(again)
+    assert cache.data(entry) == {"application": full.application}
+    assert cache.data(entry, lean=True) == {}
+
+
+def test_sections_are_lazy(tga_server, tmp_path):
+    cache = UnitOfCompetencyCache(tmp_path / "cache")
+    uoc = UnitOfCompetency("ICTAII501", cache=cache)
+    assert tga_server.requests == []
+
+    assert uoc.application.startswith("This unit describes")
+    assert "_soup" in vars(uoc)
+    assert "elements_and_criteria" not in vars(uoc)
+
+    # A second handle is served its sections from the cache without parsing
+    again = UnitOfCompetency("ICTAII501", cache=cache)
+    assert again.application == uoc.application
+    assert "_soup" not in vars(again)
+    assert len(tga_server.requests) == 1
+
+
+def test_stale_entry_is_revalidated(tga_server, tmp_path):
+    cache = UnitOfCompetencyCache(tmp_path / "cache", ttl=0)
+    first = UnitOfCompetency("ICTAII501", cache=cache)
+    first.data
+    second = UnitOfCompetency("ICTAII501", cache=cache)
+    second.data
+
+    assert [status for _, status in tga_server.requests] == [200, 304]
+    assert second.data == first.data
+
+
+def test_missing_unit(tga_server, tmp_path):
+    cache = UnitOfCompetencyCache(tmp_path / "cache")
+    uoc = UnitOfCompetency("ICTAII999", cache=cache)
+    with pytest.raises(UnitOfCompetencyNotFoundError):
+        uoc.data
+
+
+def test_prefetch_is_concurrent(tga_server, tmp_path):
+    unit_codes = ["ICTAII501", "ICTAII502", "ICTAII503", "ICTAII504"]
+    page = tga_server.pages["ICTAII501"]
+    tga_server.pages.update({unit_code: page for unit_code in unit_codes})
+    tga_server.latency = 0.5
+    cache = UnitOfCompetencyCache(tmp_path / "cache")
+
+    start = time.perf_counter()
+    units = prefetch(unit_codes + ["ICTAII501"], max_workers=4, cache=cache)
+    elapsed = time.perf_counter() - start
+
+    assert list(units) == unit_codes
+    assert all(uoc.data.elements_and_criteria for uoc in units.values())
+    assert len(tga_server.requests) == len(unit_codes)
+    # Serially this would take 4 round trips
+    assert elapsed < 2 * tga_server.latency
+
+    # The evidence lists were cached along with the sections
+    again = UnitOfCompetency("ICTAII502", cache=cache)
+    assert again.parse_knowledge_criteria()
+    assert again.parse_performance_evidence()
+    assert "_soup" not in vars(again)
+
+
+def test_server_errors_are_retried(tga_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(uoc_module, "SESSION", build_session(backoff_factor=0))
+    tga_server.failures = 2
+    cache = UnitOfCompetencyCache(tmp_path / "cache")
+
+    uoc = UnitOfCompetency("ICTAII501", cache=cache)
+    uoc.data
+
+    assert [status for _, status in tga_server.requests] == [503, 503, 200]
+    assert uoc.data.elements_and_criteria
+
+
+def test_stalled_server_times_out(tga_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(uoc_module, "SESSION", build_session(retries=0))
+    monkeypatch.setattr(uoc_module, "READ_TIMEOUT", 0.1)
+    tga_server.latency = 1
+    cache = UnitOfCompetencyCache(tmp_path / "cache")
+
+    uoc = UnitOfCompetency("ICTAII501", cache=cache)
+    with pytest.raises(UnitOfCompetencyError):
+        uoc.data
+
+
+def test_section_parsers(cache):
+    seed(cache, "ICTAII501")
+    uoc = UnitOfCompetency("ICTAII501", cache=cache)
+
+    assert set(uoc._sections) >= {section.value for section in UOCSections}
+    assert uoc.parse_knowledge_criteria() == {
+        "principles of machine learning, including:": [
+            "supervised learning",
+            "unsupervised learning",
+            "reinforcement learning",
+        ],
+        "data quality requirements for training models": [],
+        "model evaluation metrics, including:": ["accuracy", "precision and recall"],
+        "organisational policies and procedures relating to data privacy.": [],
+    }
+    assert list(uoc.parse_performance_evidence())[-2:] == [
+        "In the course of the above, the candidate must:",
+        "evaluate data sources for suitability.",
+    ]
+    assert uoc.parse_assessment_conditions()["This includes access to:"] == [
+        "data sets and machine learning software",
+        "organisational policies and procedures.",
+    ]
+
+
+def pages() -> list:
+    pages = [
+        pytest.param(page.stem, page.read_text(encoding="utf-8"), id=page.stem)
+        for page in sorted(FIXTURES.glob("*.html"))
+    ]
+    # Unclosed list items in a paragraph, which parsers repair differently
+    html = (FIXTURES / "ICTAII501.html").read_text(encoding="utf-8")
+    malformed = html.replace(
+        "<h2>Knowledge Evidence</h2>",
+        "<h2>Knowledge Evidence</h2><p>Intro:<ul><li>alpha:<li>beta</ul></p>",
+    )
+    assert malformed != html
+    return pages + [pytest.param("ICTAII501", malformed, id="malformed")]
+
+
+@pytest.mark.parametrize("unit_code, html", pages())
+def test_lean_parse_matches_full_parse(unit_code, html):
+    full = UnitOfCompetency(unit_code, lean=False, html=html)
+    lean = UnitOfCompetency(unit_code, lean=True, html=html)
+
+    assert lean.data == full.data
+    assert lean.parse_knowledge_criteria() == full.parse_knowledge_criteria()
+    assert lean.parse_performance_evidence() == full.parse_performance_evidence()
+    assert lean.parse_assessment_conditions() == full.parse_assessment_conditions()
+
+
+def test_lean_parse_finds_sections_outside_main():
+    # A layout where only the first section is in the main content region
+    html = (
+        (FIXTURES / "ICTAII501.html")
+        .read_text(encoding="utf-8")
+        .replace("</main>", "")
+        .replace(
+            "<h2>Unit Sector</h2>",
+            '</div></main><div class="unit-details"><h2>Unit Sector</h2>',
+        )
+    )
+    full = UnitOfCompetency("ICTAII501", lean=False, html=html)
+    lean = UnitOfCompetency("ICTAII501", lean=True, html=html)
+
+    assert lean.data.elements_and_criteria
+    assert lean.data == full.data
+    assert lean.parse_knowledge_criteria() == full.parse_knowledge_criteria()
+    assert lean.parse_assessment_conditions() == full.parse_assessment_conditions()
+
+
+def test_warm_cache(tga_server, tmp_path, monkeypatch):
+    cache = UnitOfCompetencyCache(tmp_path / "cache")
+    monkeypatch.setattr(uoc_module, "CACHE", cache)
+    tga_server.pages["ICTAII502"] = tga_server.pages["ICTAII501"]
+    fields = tmp_path / "course" / "2 KAD" / "1 LAP" / "fields.md"
+    fields.parent.mkdir(parents=True)
+    fields.write_text("---\nunits:\n  - id: ICTAII501\n  - id: ICTAII502\n---\n")
+
+    result = CliRunner().invoke(
+        uoc_module.app,
+        ["warm-cache", "ICTAII501", "--course", str(tmp_path / "course")],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Cached 2 of 2 units: 2 downloaded" in result.output
+    cache.offline = True
+    uoc = UnitOfCompetency("ICTAII502", cache=cache)
+    assert uoc.data.elements_and_criteria
+    assert uoc.parse_knowledge_criteria()
+    assert uoc.parse_assessment_conditions()
+    assert "_soup" not in vars(uoc)
+
+
+def test_content_hash():
+    html = (FIXTURES / "ICTAII501.html").read_text(encoding="utf-8")
+    uoc = UnitOfCompetency("ICTAII501", html=html)
+
+    reformatted = html.replace("<li>", "<li>\n  ").replace("<h2>Links", "<h2>See also")
+    assert (
+        UnitOfCompetency("ICTAII501", html=reformatted).content_hash == uoc.content_hash
+    )
+    assert (
+        UnitOfCompetency("ICTAII501", lean=True, html=html).content_hash
+        == uoc.content_hash
+    )
+
+    changed = html.replace("precision and recall", "precision")
+    assert UnitOfCompetency("ICTAII501", html=changed).content_hash != uoc.content_hash
+
+
+@pytest.mark.parametrize(
+    "tga_server", [{"latency": 0.2, "jitter": 0.1, "bandwidth": 50_000}], indirect=True
+)
+def test_injected_latency(tga_server, tmp_path):
+    cache = UnitOfCompetencyCache(tmp_path / "cache")
+
+    start = time.perf_counter()
+    UnitOfCompetency("ICTPRG443", cache=cache).data
+    elapsed = time.perf_counter() - start
+
+    page_size = len(tga_server.pages["ICTPRG443"].encode("utf-8"))
+    assert elapsed >= 0.2 + page_size / tga_server.bandwidth * 0.9
+
+    start = time.perf_counter()
+    UnitOfCompetency("ICTPRG443", cache=cache).data
+    assert time.perf_counter() - start < 0.2
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import pytest
+
+from src.utils.uoc import UnitOfCompetency
+from src.utils.uoc_store import UnitStore
+
+FIXTURES = Path(__file__).parent / "fixtures" / "uoc"
+
+
+@pytest.fixture
+def store():
+    with UnitStore(":memory:") as store:
+        yield store
+
+
+@pytest.fixture
+def uoc():
+    html = (FIXTURES / "ICTAII501.html").read_text(encoding="utf-8")
+    return UnitOfCompetency("ICTAII501", html=html)
+
+
+def test_round_trip(store, uoc):
+    store.import_unit(uoc)
+    stored = UnitOfCompetency.from_store(store, "ICTAII501")
+
+    assert stored.release == uoc.release == "1"
+    assert stored.data == uoc.data
+    assert stored.elements_and_criteria == uoc.elements_and_criteria
+    assert stored.parse_knowledge_criteria() == uoc.parse_knowledge_criteria()
+    assert stored.parse_performance_evidence() == uoc.parse_performance_evidence()
+    assert stored.parse_assessment_conditions() == uoc.parse_assessment_conditions()
+    # Nothing was fetched or parsed
+    assert "_page" not in vars(stored) and "_soup" not in vars(stored)
+
+
+def test_reimport_replaces_release(store, uoc):
+    store.import_unit(uoc)
+    store.import_unit(uoc)
+
+    assert store.unit_codes() == ["ICTAII501"]
+    assert len(store.search("reinforcement")) == 1
+
+
+def test_search(store, uoc):
+    store.import_unit(uoc)
+
+    results = store.search("precision")
+    assert [(r.unit_code, r.section, r.text) for r in results] == [
+        ("ICTAII501", "knowledge_criteria", "precision and recall")
+    ]
+    assert {r.section for r in store.search("design")} >= {
+        "elements_and_criteria",
+        "performance_criteria",
+    }
+    assert store.search("design", unit_code="ICTAII999") == []
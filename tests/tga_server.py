@@ -0,0 +1,110 @@
+"""Local stand-in for training.gov.au serving the fixture unit pages"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent / "fixtures" / "uoc"
+DETAILS = "/training/details/"
+
+
+def load_pages(directory: Path = FIXTURES) -> dict[str, str]:
+    """
+    Load the fixture unit pages keyed by unit code (the file name without suffix).
+    """
+    return {
+        path.stem: path.read_text(encoding="utf-8")
+        for path in sorted(directory.glob("*.html"))
+    }
+
+
+class TrainingGovServer(ThreadingHTTPServer):
+    """
+    Serves ``/training/details/<unit code>`` from a dictionary of pages.
+
+    Every response is delayed by ``latency`` seconds plus up to ``jitter`` seconds
+    of random delay, and page bodies are sent at ``bandwidth`` bytes per second
+    (unlimited if 0) to mimic the real site. Pages carry an ETag and honour
+    If-None-Match so cache revalidation can be exercised. The next
+    ``failures`` requests are answered with 503 Service Unavailable. Requests are
+    recorded in ``requests`` as (path, status) tuples.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        pages: dict[str, str],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        bandwidth: int = 0,
+    ):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.pages = pages
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.failures = 0
+        self.requests: list[tuple[str, int]] = []
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{DETAILS}"
+
+    def __enter__(self) -> TrainingGovServer:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: TrainingGovServer
+
+    def do_GET(self):
+        time.sleep(self.server.latency + random.uniform(0, self.server.jitter))
+        if self.server.failures > 0:
+            self.server.failures -= 1
+            return self._respond(503)
+
+        page = None
+        if self.path.startswith(DETAILS):
+            page = self.server.pages.get(self.path[len(DETAILS) :])
+        if page is None:
+            return self._respond(404)
+
+        etag = '"' + hashlib.sha1(page.encode("utf-8")).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._respond(304, etag=etag)
+        self._respond(200, page.encode("utf-8"), etag=etag)
+
+    def _respond(self, status: int, body: bytes = b"", etag: str | None = None):
+        self.server.requests.append((self.path, status))
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        if body:
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not self.server.bandwidth:
+            return self.wfile.write(body)
+        # Send the body in 16 KiB chunks paced to the configured bandwidth
+        chunk_size = 16 * 1024
+        for start in range(0, len(body), chunk_size):
+            chunk = body[start : start + chunk_size]
+            self.wfile.write(chunk)
+            time.sleep(len(chunk) / self.server.bandwidth)
+
+    def log_message(self, format, *args):
+        pass